@@ -0,0 +1,72 @@
+"""
+Compares the columnar CableComAppManager._add_additional_attachments against the original cell by cell loop
+
+Run from the project folder:
+python -m benchmarks.additional_attachments
+"""
+import time
+import numpy as np
+import pandas as pd
+import model.excel_manager as em
+import model.format_fulcrum as ff
+
+ROW_COUNTS = [1_000, 10_000, 50_000]
+ATTACHMENT_COLUMNS = [f"attachment_{number}" for number in range(35)]
+FILLED_FRACTION = 0.1  # Most attachment cells in a download are empty
+REPEAT = 3
+
+
+def create_manager(row_count: int, seed: int = 0) -> ff.CableComAppManager:
+    """Creates a manager with a synthetic attachment DataFrame and additional measurements"""
+    rng = np.random.default_rng(seed)
+    heights = rng.integers(1500, 4000, size=(row_count, len(ATTACHMENT_COLUMNS)))
+    is_filled = rng.random(size=heights.shape) < FILLED_FRACTION
+    attachment_df = pd.DataFrame(np.where(is_filled, heights, np.nan), columns=ATTACHMENT_COLUMNS).astype('Int64')
+    notes = np.where(rng.random(row_count) < 0.3, 'fiber: 2701', 'nan')
+
+    manager = ff.CableComAppManager(file_path='')
+    manager.set_excel_manager(em.select_template('PSE'))
+    manager.attachment_df = attachment_df
+    manager.df = pd.DataFrame({'additional_measurements': notes.astype(object)})
+    return manager
+
+
+def add_additional_attachments_cell_by_cell(manager: ff.CableComAppManager) -> None:
+    """The original loop (Kept to measure the speedup and check the results match)"""
+    manager.attachment_df = manager.attachment_df.drop(columns=manager.excel_manager.standard_headers,
+                                                       errors='ignore')
+    for i in manager.attachment_df.index:
+        for j in manager.attachment_df.columns:
+            if pd.notna(manager.attachment_df.at[i, j]):
+                note = f"{j}: {manager.attachment_df.at[i, j]}"
+                if manager.df.at[i, 'additional_measurements'] == 'nan':
+                    manager.df.at[i, 'additional_measurements'] = note
+                else:
+                    manager.df.at[i, 'additional_measurements'] += '\n' + note
+
+
+def time_once(function, row_count: int) -> float:
+    """Times one run on a fresh manager (Creating the manager isn't timed)"""
+    manager = create_manager(row_count)
+    start = time.perf_counter()
+    function(manager)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'rows':>7} {'cell by cell (ms)':>18} {'columnar (ms)':>14} {'speedup':>8}")
+    for row_count in ROW_COUNTS:
+        expected = create_manager(row_count)
+        add_additional_attachments_cell_by_cell(expected)
+        actual = create_manager(row_count)
+        actual._add_additional_attachments()
+        assert actual.df['additional_measurements'].tolist() == expected.df['additional_measurements'].tolist()
+
+        cell_by_cell = min(time_once(add_additional_attachments_cell_by_cell, row_count) for _ in range(REPEAT))
+        columnar = min(time_once(ff.CableComAppManager._add_additional_attachments, row_count) for _ in range(REPEAT))
+        print(f"{row_count:>7} {cell_by_cell * 1000:>18.1f} {columnar * 1000:>14.1f} "
+              f"{cell_by_cell / columnar:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Compares Pole.find_violations against the original all pairs loop on synthetic poles
+
+Run from the project folder:
+python -m benchmarks.find_violations
+"""
+import random
+import timeit
+from model.notes import NotePair
+from model.pole import Pole
+
+POWER_NAMES = ['neutral_height', 'secondary_spool', 'drip_loop', 'secondary_riser', 'primary_riser']
+COMM_NAMES = ['catv', 'catv_2nd_attach', 'telco', 'telco_2', 'fiber', 'fiber_2', 'comm_1', 'comm_2', 'frontier']
+ATTACHMENT_COUNTS = [10, 25, 50, 100, 250, 500]
+POLES_PER_SIZE = 20
+
+
+def create_pole(rng: random.Random, attachment_count: int) -> Pole:
+    """Creates a pole with attachments listed in its field notes between 15' and 40'"""
+    notes = []
+    for _ in range(attachment_count):
+        name = rng.choice(POWER_NAMES if rng.random() < 0.3 else COMM_NAMES)
+        inches = rng.randint(15 * 12, 40 * 12)
+        notes.append(NotePair(name, f"{inches // 12}{inches % 12:02d}"))
+    if rng.random() < 0.2:
+        notes.append(NotePair('streetlight', f"{rng.randint(24, 30)}00"))
+    row = {
+        '_title': f"{attachment_count}-{rng.randint(1, 999)}",
+        'grounded': 'Yes' if rng.random() < 0.5 else 'No',
+        'molded': 'No',
+        'additional_measurements': tuple(notes),
+        'make_ready': (),
+    }
+    return Pole(row)
+
+
+def find_violations_all_pairs(pole: Pole) -> str:
+    """The original O(n^2) loop (Kept to measure the speedup and check the results match)"""
+    violations = ""
+    pole.attachment_list.sort(reverse=True)
+    for i, attachment1 in enumerate(pole.attachment_list):
+        for attachment2 in pole.attachment_list[i + 1:]:
+            if attachment1.check_for_violation(attachment2) is not None:
+                violations += attachment1.check_for_violation(attachment2) + "\n"
+    return violations.rstrip()
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'attachments':>11} {'all pairs (ms)':>15} {'sweep (ms)':>11} {'speedup':>8}")
+    for attachment_count in ATTACHMENT_COUNTS:
+        poles = [create_pole(rng, attachment_count) for _ in range(POLES_PER_SIZE)]
+        assert [find_violations_all_pairs(pole) for pole in poles] == [pole.find_violations() for pole in poles]
+        all_pairs = min(timeit.repeat(lambda: [find_violations_all_pairs(pole) for pole in poles], number=1, repeat=3))
+        sweep = min(timeit.repeat(lambda: [pole.find_violations() for pole in poles], number=1, repeat=3))
+        print(f"{attachment_count:>11} {all_pairs * 1000 / POLES_PER_SIZE:>15.3f} "
+              f"{sweep * 1000 / POLES_PER_SIZE:>11.3f} {all_pairs / sweep:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Checks startup import times with python -X importtime so heavy imports don't creep back into startup
+
+Each module is imported in a fresh interpreter. The check fails (Exit code 1) if importing it takes longer than its
+budget or pulls in pandas, numpy or openpyxl. Modules whose dependencies aren't installed are skipped.
+
+Run from the project folder:
+python -m benchmarks.import_time
+"""
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# Module to import and the most milliseconds it may take (Not counting the interpreter itself starting)
+STARTUP_BUDGETS_MS = {
+    'main': 100,
+    'cli': 75,
+    'view.gui_2': 1000,  # customtkinter and Tk alone take most of this
+}
+HEAVY_MODULES = ['pandas', 'numpy', 'openpyxl']
+IMPORT_TIME_PATTERN = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+# ----- Static Methods ----- #
+def measure(module: str) -> Tuple[Optional[float], List[str], str]:
+    """Imports the module in a new interpreter and returns (milliseconds, heavy modules imported, error)"""
+    code = f"import sys, {module}; print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, ['.', os.environ.get('PYTHONPATH')])))
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                             env=environment)
+    if process.returncode != 0:
+        return None, [], process.stderr.strip().splitlines()[-1]
+
+    # Only the module's own top level entries are added up (Their cumulative time includes everything they import and
+    # leaves out the interpreter starting)
+    package = module.split('.')[0]
+    microseconds = 0
+    for line in process.stderr.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if match and len(match.group(3)) == 1 and match.group(4).split('.')[0] == package:
+            microseconds += int(match.group(2))
+    heavy_modules = [name for name in process.stdout.strip().split(',') if name]
+    return microseconds / 1000, heavy_modules, ''
+
+
+def check(budgets: Dict[str, float] = None) -> bool:
+    """Prints each module's import time and returns whether every module is within its budget"""
+    budgets = budgets or STARTUP_BUDGETS_MS
+    passed = True
+    print(f"{'module':<14} {'import (ms)':>12} {'budget (ms)':>12}  result")
+    for module, budget in budgets.items():
+        milliseconds, heavy_modules, error = measure(module)
+        if milliseconds is None:
+            print(f"{module:<14} {'':>12} {budget:>12}  SKIPPED ({error})")
+            continue
+        problems = []
+        if milliseconds > budget:
+            problems.append('over budget')
+        if heavy_modules:
+            problems.append(f"imports {', '.join(heavy_modules)}")
+        passed = passed and not problems
+        print(f"{module:<14} {milliseconds:>12.1f} {budget:>12}  {'; '.join(problems) or 'OK'}")
+    return passed
+
+
+if __name__ == '__main__':
+    sys.exit(0 if check() else 1)
@@ -0,0 +1,68 @@
+"""
+Compares column note parsing against the original row by row loop on 50,000 synthetic notes
+
+Run from the project folder:
+python -m benchmarks.parse_notes
+"""
+import random
+import timeit
+import pandas as pd
+from model.notes import parse_note, reverse_parse_note, parse_notes, reverse_parse_notes
+
+ROW_COUNT = 50_000
+NAMES = ['catv', 'catv_2nd_attach', 'telco', 'fiber', 'drip_loop', 'secondary_spool', 'Move CATV to', 'Lower Telco to']
+COMMENTS = ['Dress Drip Loop', 'Ground Streetlight', 'Mold Streetlight']
+
+
+def create_note(rng: random.Random) -> str:
+    """Creates a note of 0 to 6 'name: value' lines and comments"""
+    lines = []
+    for _ in range(rng.randint(0, 6)):
+        if rng.random() < 0.8:
+            inches = rng.randint(15 * 12, 40 * 12)
+            lines.append(f"{rng.choice(NAMES)}: {inches // 12}' {inches % 12:02d}\"")
+        else:
+            lines.append(rng.choice(COMMENTS))
+    return '\n'.join(lines) if lines else 'nan'
+
+
+def parse_column_row_by_row(df: pd.DataFrame, column: str) -> None:
+    """The original iterrows loop (Kept to measure the speedup and check the results match)"""
+    for index, row in df.iterrows():
+        df.at[index, column] = parse_note(row[column])
+
+
+def reverse_parse_column_row_by_row(df: pd.DataFrame, column: str) -> None:
+    for index, row in df.iterrows():
+        df.at[index, column] = reverse_parse_note(row[column])
+
+
+def main():
+    rng = random.Random(0)
+    notes = pd.Series([create_note(rng) for _ in range(ROW_COUNT)], dtype=object)
+
+    # Results match the row by row loop and turn back into the same text
+    df = pd.DataFrame({'make_ready': notes})
+    parse_column_row_by_row(df, 'make_ready')
+    parsed = parse_notes(notes)
+    assert parsed.tolist() == df['make_ready'].tolist()
+    reverse_parse_column_row_by_row(df, 'make_ready')
+    assert reverse_parse_notes(parsed).tolist() == df['make_ready'].tolist() == notes.tolist()
+
+    def row_by_row():
+        df = pd.DataFrame({'make_ready': notes})
+        parse_column_row_by_row(df, 'make_ready')
+        reverse_parse_column_row_by_row(df, 'make_ready')
+
+    def column():
+        reverse_parse_notes(parse_notes(notes))
+
+    row_by_row_time = min(timeit.repeat(row_by_row, number=1, repeat=3))
+    column_time = min(timeit.repeat(column, number=1, repeat=3))
+    print(f"{'rows':>7} {'row by row (ms)':>16} {'column (ms)':>12} {'speedup':>8}")
+    print(f"{ROW_COUNT:>7} {row_by_row_time * 1000:>16.1f} {column_time * 1000:>12.1f} "
+          f"{row_by_row_time / column_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Times each stage of the Make Ready and Format pipelines on the synthetic workbooks and writes the timings as JSON
+
+PSE template workbooks go through the Make Ready pipeline and CableComApp downloads go through the Format pipeline
+(With violations added like in the CableComAppManager example). Workbooks are always read from disk, never from the
+workbook cache. Attachments are extracted in extract_poles. Stages that run twice (Formatting back to template
+headers and reverse parsing the notes) add up.
+
+Run from the project folder:
+python -m benchmarks.stages
+python -m benchmarks.stages --sizes 100 1000 10000 100000 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+import model.excel_manager as em
+import model.format_fulcrum as ff
+from model.pole_manager import PoleManager
+import benchmarks.workbooks as workbooks
+
+SIZES = [100, 1_000, 10_000, 100_000]
+DEFAULT_SIZES = [100, 1_000, 10_000]  # 100k poles takes a while to generate and run
+STAGES = ['read', 'format', 'parse_column', 'extract_poles', 'set_to_proposed', 'get_all_violations',
+          'update_make_ready', 'create_output']
+
+
+class StageTimer:
+    """
+    Adds up the time spent in each stage
+
+    self.timings: Seconds spent in each stage in the order the stages first ran
+
+    Example of use:
+    timer = StageTimer()
+    timer.run('read', excel_manager.read_excel, use_cache=False)
+    timer.timings  # {'read': 0.42}
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    def run(self, stage: str, function: Callable, *args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - start
+        return result
+
+
+# ----- Static Methods ----- #
+def time_make_ready(file_path: str, output_path: str) -> Dict[str, float]:
+    """Make Ready on a PSE template workbook (Same steps as the ExcelManager example)"""
+    timer = StageTimer()
+    excel_manager = em.select_template('PSE')
+    excel_manager.set_file_path(file_path)
+    timer.run('read', excel_manager.read_excel, use_cache=False)
+    timer.run('format', excel_manager.format)
+    timer.run('parse_column', excel_manager.parse_column, 'additional_measurements')
+    timer.run('parse_column', excel_manager.parse_column, 'make_ready')
+
+    poles = PoleManager()
+    timer.run('extract_poles', poles.extract_poles, excel_manager.df)
+    timer.run('extract_poles', poles.extract_attachments)
+    timer.run('set_to_proposed', poles.set_to_proposed)
+    timer.run('get_all_violations', poles.get_all_violations)
+
+    timer.run('parse_column', excel_manager.reverse_parse_column, 'make_ready')
+    timer.run('update_make_ready', excel_manager.update_make_ready, poles.pole_list)
+    timer.run('parse_column', excel_manager.reverse_parse_column, 'additional_measurements')
+    timer.run('format', excel_manager.format)
+    timer.run('create_output', excel_manager.create_output, output_path)
+    return timer.timings
+
+
+def time_format(file_path: str, output_path: str) -> Dict[str, float]:
+    """Format on a CableComApp download with violations added (Same steps as the CableComAppManager example)"""
+    timer = StageTimer()
+    excel_manager = em.select_template('PSE')
+    fulcrum_excel = ff.CableComAppManager(file_path=file_path)
+    fulcrum_excel.set_excel_manager(excel_manager)
+    timer.run('read', fulcrum_excel.read_excel, use_cache=False)
+
+    poles = PoleManager()
+    timer.run('extract_poles', poles.extract_poles, fulcrum_excel.make_ready_df)
+    timer.run('extract_poles', poles.extract_attachments)
+    timer.run('get_all_violations', poles.get_all_violations)
+    timer.run('update_make_ready', fulcrum_excel.update_make_ready, poles.pole_list)
+    timer.run('format', fulcrum_excel.format_to_template)
+
+    timer.run('create_output', excel_manager.read_data_frame, fulcrum_excel.df)
+    timer.run('create_output', excel_manager.create_output, output_path)
+    return timer.timings
+
+
+def get_commit() -> str:
+    """Commit the timings are for (Empty outside of a git checkout)"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run(sizes: List[int], seed: int = 0) -> dict:
+    """Times both pipelines at every size"""
+    results = []
+    with tempfile.TemporaryDirectory() as output_directory:
+        for pole_count in sizes:
+            for kind, time_pipeline in ((workbooks.PSE, time_make_ready), (workbooks.CABLECOM, time_format)):
+                file_path = workbooks.get_workbook(kind, pole_count, seed)
+                timings = time_pipeline(file_path, os.path.join(output_directory, f"{kind}_{pole_count}.xlsx"))
+                results.append({
+                    'workbook': kind,
+                    'poles': pole_count,
+                    'stages': {stage: round(timings[stage], 4) for stage in STAGES if stage in timings},
+                    'total': round(sum(timings.values()), 4),
+                })
+                print(f"{kind:>8} {pole_count:>7} poles {results[-1]['total']:>9.2f}s", file=sys.stderr)
+    return {
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Times each pipeline stage on synthetic pole workbooks')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help=f"Pole counts to run (Any of {SIZES} or others)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='JSON file to write (Printed if not given)')
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
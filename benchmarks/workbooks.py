@@ -0,0 +1,187 @@
+"""
+Seeded synthetic PSE template and CableComApp download workbooks for the benchmarks
+
+The same seed and pole count always give the same workbook, so timings can be compared across commits. Workbooks are
+generated once and kept in benchmarks/workbooks.
+
+Run from the project folder:
+python -m benchmarks.workbooks 100 1000 10000
+"""
+import os
+import random
+import sys
+from typing import Dict, Iterator, List, Optional
+import openpyxl
+import model.excel_manager as em
+import model.streaming as streaming
+
+WORKBOOK_DIRECTORY = 'benchmarks/workbooks'
+CABLECOM_SAMPLE = 'model/user_input/cablecom_poles.xlsx'  # Only its header row is used
+PSE = 'pse'
+CABLECOM = 'cablecom'
+
+MAKE_READY_COMMENTS = {'drip_loop': ['Dress Drip Loop'], 'streetlight': ['Ground Streetlight', 'Mold Streetlight']}
+MOVE_COMMENTS = ['Move CATV to', 'Move TelCo to', 'Move Fiber to']
+FIELD_NOTE_NAMES = ['CATV second attach', 'Telco second attach', 'Drop', 'pse_primary_riser', 'fiber_2']
+EXTRA_CABLECOM_ATTACHMENTS = ['pse_primary_riser', '2nd_attach', 'telco_2', 'fiber_2', 'comm_1', 'guy_hk']
+
+
+# ----- Static Methods ----- #
+def to_height(inches: int) -> int:
+    """Height as it is measured in the field (25' 06" is 2506)"""
+    return inches // 12 * 100 + inches % 12
+
+
+def to_feet_and_inches(inches: int) -> str:
+    return f"{inches // 12}' {inches % 12:02d}\""
+
+
+def create_heights(rng: random.Random) -> Dict[str, Optional[int]]:
+    """Power between 25' and 36' with comm below it (Some attachments end up too close on purpose)"""
+    neutral = rng.randint(25 * 12, 36 * 12)
+    secondary = neutral - rng.randint(0, 12) if rng.random() < 0.7 else None
+    drip_loop = (secondary or neutral) - rng.randint(18, 36) if rng.random() < 0.6 else None
+    secondary_riser = neutral + rng.randint(0, 6) if rng.random() < 0.3 else None
+    streetlight = neutral - rng.randint(24, 60) if rng.random() < 0.25 else None
+    comm_top = neutral - rng.randint(36, 84)
+    return {
+        'neutral': neutral,
+        'secondary': secondary,
+        'drip_loop': drip_loop,
+        'secondary_riser': secondary_riser,
+        'streetlight': streetlight,
+        'catv': comm_top - rng.randint(0, 12) if rng.random() < 0.8 else None,
+        'telco': comm_top - rng.randint(6, 30) if rng.random() < 0.6 else None,
+        'fiber': comm_top - rng.randint(0, 24) if rng.random() < 0.7 else None,
+    }
+
+
+def create_make_ready_notes(rng: random.Random, heights: Dict[str, Optional[int]]) -> Optional[str]:
+    """About 40% of poles have make ready comments"""
+    if rng.random() >= 0.4:
+        return None
+    # Only comment on attachments the pole has (Otherwise every comment logs a warning)
+    lines = [comment for name, comments in MAKE_READY_COMMENTS.items() if heights[name] is not None
+             for comment in comments if rng.random() < 0.5]
+    for comment, name in zip(MOVE_COMMENTS, ['catv', 'telco', 'fiber']):
+        if heights[name] is not None and rng.random() < 0.4:
+            lines.append(f"{comment}: {to_feet_and_inches(heights[name] - rng.randint(6, 24))}")
+    return '\n'.join(lines) or None
+
+
+def create_field_notes(rng: random.Random, comm_top: int) -> List[str]:
+    """About 30% of poles have attachments in the field notes"""
+    if rng.random() >= 0.3:
+        return []
+    names = rng.sample(FIELD_NOTE_NAMES, rng.randint(1, 3))
+    return [f"{name}: {to_height(comm_top - rng.randint(0, 36))}" for name in names]
+
+
+def create_pse_rows(pole_count: int, seed: int = 0) -> Iterator[Dict]:
+    """Rows of a filled in PSE template (Template headers plus grounded and molded)"""
+    rng = random.Random(seed)
+    for number in range(1, pole_count + 1):
+        heights = create_heights(rng)
+        field_notes = create_field_notes(rng, heights['neutral'] - 48)
+        yield {
+            'Seq #': f"{number}-1",
+            'PSE Pole #': f"{rng.randint(400000, 499999)}-{rng.randint(100000, 199999)}" if rng.random() < 0.7
+            else 'nan',
+            'Pole Type T/D': rng.choice(['Distribution', 'Transmission']),
+            'Pole Owner': 'PSE',
+            'PSE Umap': 'nan',
+            'Location': 'nan',
+            'City/Area': 'nan',
+            'Neutral': to_height(heights['neutral']),
+            'Secondary': _optional_height(heights['secondary']),
+            'Drip Loop': _optional_height(heights['drip_loop']),
+            'Secondary Riser': _optional_height(heights['secondary_riser']),
+            'Street Light': _optional_height(heights['streetlight']),
+            'CATV': _optional_height(heights['catv']),
+            'TelCo': _optional_height(heights['telco']),
+            'Fiber': _optional_height(heights['fiber']),
+            'Requested Attachment': None,
+            'Make Ready Notes': create_make_ready_notes(rng, heights),
+            'Mid Span Violation Notes': 'nan',
+            'PSE Field Notes': '\n'.join(field_notes) or 'nan',
+            'grounded': rng.choice(['Yes', 'No', 'nan']),
+            'molded': rng.choice(['Yes', 'No', 'nan']),
+        }
+
+
+def create_cablecom_rows(headers: List[str], pole_count: int, seed: int = 0) -> Iterator[List]:
+    """Rows of a CableComApp download with the same columns as the sample download"""
+    rng = random.Random(seed)
+    for number in range(1, pole_count + 1):
+        heights = create_heights(rng)
+        comm_top = heights['neutral'] - 48
+        row = dict.fromkeys(headers)
+        row.update({
+            '_record_id': f"{rng.getrandbits(128):032x}",
+            '_status': 'Fielded Pole',
+            '_title': f"{number}-1",
+            'sequence_number': number,
+            'jursidiction': 'PSE',
+            'pse_pole_type': rng.choice(['Distribution', 'Transmission']),
+            'pse_tag_number': f"{rng.randint(400000, 499999)}-{rng.randint(100000, 199999)}" if rng.random() < 0.7
+            else None,
+            'neutral_height': to_height(heights['neutral']),
+            'secondary_spool': _optional_height(heights['secondary']),
+            'drip_loop': _optional_height(heights['drip_loop']),
+            'secondary_riser': _optional_height(heights['secondary_riser']),
+            'streetlight': _optional_height(heights['streetlight']),
+            'streetlight_grounded': rng.choice(['yes', 'no']) if heights['streetlight'] else None,
+            'streetlight_molded': rng.choice(['yes', 'no']) if heights['streetlight'] else None,
+            'catv': _optional_height(heights['catv']),
+            'telco': _optional_height(heights['telco']),
+            'fiber': _optional_height(heights['fiber']),
+            'additional_measurements': '\n'.join(create_field_notes(rng, comm_top)) or None,
+        })
+        # Attachments without a template column end up in the field notes when formatted
+        for name in rng.sample(EXTRA_CABLECOM_ATTACHMENTS, rng.randint(0, 2)):
+            row[name] = to_height(comm_top - rng.randint(0, 36))
+        yield [row[header] for header in headers]
+
+
+def write_pse_workbook(file_path: str, pole_count: int, seed: int = 0) -> None:
+    """Writes the rows under the headers of the PSE template"""
+    streaming.write_output(create_pse_rows(pole_count, seed), em.select_template('PSE'), file_path)
+
+
+def write_cablecom_workbook(file_path: str, pole_count: int, seed: int = 0) -> None:
+    """Writes a header row and the rows with a write only workbook"""
+    sample_wb = openpyxl.load_workbook(CABLECOM_SAMPLE, read_only=True)
+    headers = list(next(sample_wb.active.values))
+    sample_wb.close()
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(headers)
+    for row in create_cablecom_rows(headers, pole_count, seed):
+        ws.append(row)
+    wb.save(file_path)
+
+
+def get_workbook(kind: str, pole_count: int, seed: int = 0, directory: str = WORKBOOK_DIRECTORY) -> str:
+    """Path of the synthetic workbook (Generated the first time it is asked for)"""
+    file_path = os.path.join(directory, f"{kind}_{pole_count}_{seed}.xlsx")
+    if not os.path.exists(file_path):
+        os.makedirs(directory, exist_ok=True)
+        temp_path = file_path + '.tmp.xlsx'
+        if kind == PSE:
+            write_pse_workbook(temp_path, pole_count, seed)
+        elif kind == CABLECOM:
+            write_cablecom_workbook(temp_path, pole_count, seed)
+        else:
+            raise ValueError(f"Unknown workbook kind '{kind}'")
+        os.replace(temp_path, file_path)
+    return file_path
+
+
+def _optional_height(inches: Optional[int]) -> Optional[int]:
+    return None if inches is None else to_height(inches)
+
+
+if __name__ == '__main__':
+    for count in [int(argument) for argument in sys.argv[1:]] or [100, 1_000]:
+        for workbook_kind in (PSE, CABLECOM):
+            print(get_workbook(workbook_kind, count))
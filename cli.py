@@ -0,0 +1,224 @@
+"""
+Runs Format and Make Ready without the GUI (For servers, scheduled tasks and pipelines)
+
+Run from the project folder:
+python cli.py format user_input/cablecom_poles.xlsx output/output.xlsx --template PSE
+python cli.py make-ready user_input/pole_data_make_ready.xlsx --include-make-ready --json
+python cli.py make-ready user_input/pole_data.xlsx --output output/make_ready.xlsx
+python cli.py serve --port 8765 --workers 2 --job-directory C:/jobs
+python cli.py gui
+
+Exit codes:
+0 The job finished
+1 The job failed (The error is printed to stderr)
+2 The command line was wrong
+3 Violations were found and --fail-on-violations was given
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import traceback
+from typing import List, Optional
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_VIOLATIONS = 3
+
+FORMAT_INPUT_TEMPLATE = 'Cable Comm App'
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Pole permit spreadsheet tools')
+    parser.add_argument('--log-level', default='WARNING', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='Log messages at this level or higher are written to stderr')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    format_parser = subparsers.add_parser('format', help='Formats a CableComApp download to a template')
+    format_parser.add_argument('input', help='CableComApp download (.xlsx)')
+    format_parser.add_argument('output', help='Formatted spreadsheet to create (.xlsx)')
+    _add_common_arguments(format_parser)
+
+    make_ready_parser = subparsers.add_parser('make-ready', help='Finds make ready violations in a template')
+    make_ready_parser.add_argument('input', help='Spreadsheet that uses the template (.xlsx)')
+    make_ready_parser.add_argument('--output', help='Writes the template with violations added to the make ready '
+                                                    'notes (Otherwise the violations are only printed)')
+    make_ready_parser.add_argument('--include-make-ready', action='store_true',
+                                   help='Moves attachments to their make ready heights before finding violations')
+    make_ready_parser.add_argument('--fail-on-violations', action='store_true',
+                                   help=f"Exits with {EXIT_VIOLATIONS} if any pole has a violation")
+    _add_common_arguments(make_ready_parser)
+
+    serve_parser = subparsers.add_parser('serve', help='Runs jobs sent over HTTP in a process that stays warm')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (Default: this computer only)')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    serve_parser.add_argument('--workers', type=_positive_int, default=2, help='Jobs that run at the same time')
+    serve_parser.add_argument('--max-queued', type=_positive_int, default=16,
+                              help='Jobs that can wait for a worker before new ones are turned away')
+    serve_parser.add_argument('--job-directory', default='jobs',
+                              help='Folder that every input and output path of a request has to be in')
+    serve_parser.add_argument('--allowed-host', action='append', default=[], dest='allowed_hosts',
+                              help='Other host name or address the service is reached by (Can be given more than '
+                                   'once and is needed with --host 0.0.0.0)')
+
+    subparsers.add_parser('gui', help='Opens the window')
+    return parser
+
+
+def run_format(args: argparse.Namespace) -> dict:
+    """Formats the download and returns what happened"""
+    import model.model as m
+    from view.excel_spreadsheet import ExcelFile
+
+    input_excel = ExcelFile()
+    input_excel.path = args.input
+    input_excel.template = FORMAT_INPUT_TEMPLATE
+    output_excel = ExcelFile()
+    output_excel.path = args.output
+    output_excel.template = args.template
+    _make_output_directory(args.output)
+    m.format_to_template(input_excel, output_excel, use_cache=not args.no_cache)
+    return {'output': args.output}
+
+
+def run_make_ready(args: argparse.Namespace) -> dict:
+    """Finds the violations (And writes them to the output if there is one) and returns what happened"""
+    import model.model as m
+    from view.excel_spreadsheet import ExcelFile
+
+    input_excel = ExcelFile()
+    input_excel.path = args.input
+    input_excel.template = args.template
+    if args.output:
+        # Written one row at a time so large files don't have to fit in memory
+        output_excel = ExcelFile()
+        output_excel.path = args.output
+        output_excel.template = args.template
+        _make_output_directory(args.output)
+        m.create_make_ready_output(input_excel, output_excel, args.include_make_ready)
+        return {'output': args.output}
+
+    pole_list = m.get_pole_list_with_violations(input_excel, args.include_make_ready, use_cache=not args.no_cache)
+    poles = [{'sequence_number': str(pole.sequence_number), 'make_ready': pole.make_ready or ''}
+             for pole in pole_list]
+    return {'poles': poles}
+
+
+def run_gui() -> int:
+    """Only imports the GUI when it is asked for"""
+    import main
+    main.main()
+    return EXIT_OK
+
+
+def run_serve(args: argparse.Namespace) -> int:
+    """Serves until interrupted"""
+    import model.service as service
+    try:
+        service.serve(host=args.host, port=args.port, workers=args.workers, max_queued=args.max_queued,
+                      job_directory=args.job_directory, allowed_hosts=args.allowed_hosts)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return EXIT_USAGE
+    return EXIT_OK
+
+
+def run(argv: Optional[List[str]] = None) -> int:
+    """Runs the command and returns the exit code"""
+    parser = create_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'make-ready' and args.output and args.no_cache:
+        parser.error('--no-cache can\'t be used with --output (The output is read one row at a time and never cached)')
+    if args.command == 'gui':
+        return run_gui()
+
+    logging.basicConfig(stream=sys.stderr, level=args.log_level, format='%(levelname)s - %(message)s')
+    if args.command == 'serve':
+        return run_serve(args)
+    if not os.path.isfile(args.input):
+        print(f"Input file not found: {args.input}", file=sys.stderr)
+        return EXIT_USAGE
+
+    import model.diagnostics as diagnostics
+    import model.instrumentation as instrumentation
+
+    # Run the job and time it
+    result = {'command': args.command, 'input': args.input, 'template': args.template}
+    start = time.perf_counter()
+    with instrumentation.record() as run_instrumentation, diagnostics.collect() as collector:
+        try:
+            result.update(run_format(args) if args.command == 'format' else run_make_ready(args))
+            exit_code = EXIT_OK
+        except Exception as error:
+            logging.debug(traceback.format_exc())
+            result['error'] = f"{type(error).__name__}: {error}"
+            exit_code = EXIT_FAILED
+    result['seconds'] = round(time.perf_counter() - start, 4)
+    result['timings'] = run_instrumentation.to_dict()['timings']
+    result['counters'] = run_instrumentation.counters
+    result['warnings'] = collector.get_by_kind()
+
+    has_violations = run_instrumentation.counters.get(instrumentation.VIOLATIONS, 0) > 0
+    if exit_code == EXIT_OK and args.command == 'make-ready' and args.fail_on_violations and has_violations:
+        exit_code = EXIT_VIOLATIONS
+    result['exit_code'] = exit_code
+
+    # Report
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_result(result)
+    return exit_code
+
+
+# ----- Static Methods ----- #
+def print_result(result: dict) -> None:
+    """Human readable version of the JSON output"""
+    if 'error' in result:
+        print(f"{result['command']} failed: {result['error']}", file=sys.stderr)
+        return
+    for pole in result.get('poles', []):
+        if pole['make_ready']:
+            print(f"{pole['sequence_number']}:")
+            for line in pole['make_ready'].splitlines():
+                print(f"    {line}")
+    counters = result['counters']
+    if 'poles' in counters:
+        # Format jobs don't look for violations
+        violations = f", {counters.get('violations', 0)} violations" if result['command'] == 'make-ready' else ''
+        print(f"{counters['poles']} poles{violations}")
+    if 'output' in result:
+        print(f"Wrote {result['output']}")
+    timings = ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in result['timings'].items())
+    print(f"Finished in {result['seconds']:.2f}s" + (f" ({timings})" if timings else ''))
+
+
+def _add_common_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--template', default='PSE', help='Template name (Default: PSE)')
+    parser.add_argument('--json', action='store_true', help='Prints the result as JSON')
+    parser.add_argument('--no-cache', action='store_true', help='Always parses the input again')
+
+
+def _positive_int(value: str) -> int:
+    """argparse type for counts that have to be at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value} is not a whole number") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} has to be at least 1")
+    return number
+
+
+def _make_output_directory(output_path: str) -> None:
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -1,11 +1,14 @@
-import model.excel_manager as em
-from model.pole_manager import PoleManager
 import logging
 import os
-from view.gui_2 import View
+import model.diagnostics as diagnostics
+import model.prewarm as prewarm
 
+# Only light modules are imported here so the window shows right away (The model is loaded by the prewarm thread or
+# the first Format or Make Ready job)
+PREWARM = True
 
-def main():
+
+def main(prewarm_model: bool = PREWARM):
     # Remove log file if it is there
     log_file = 'model/logging/log.log'
     if os.path.exists(log_file):
@@ -17,8 +20,19 @@ def main():
         level=logging.DEBUG,
         format='%(levelname)s - %(message)s',
     )
+    # Log records are written to the file on a listener thread so jobs never wait on the disk
+    listener = diagnostics.start_queue_logging()
+
+    # Load pandas, openpyxl and the model while the window opens
+    if prewarm_model:
+        prewarm.start()
 
-    View()
+    # customtkinter is only imported when the window is opened
+    from view.gui_2 import View
+    try:
+        View()
+    finally:
+        listener.stop()
 
     # # Read excel data and format for PoleManager
     # excel_manager = em.select_template('PSE')
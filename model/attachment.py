@@ -1,9 +1,10 @@
 import model.constants as constants
-import logging
+import model.diagnostics as diagnostics
+import model.identifier_registry as ir
+import model.instrumentation as instrumentation
 import os
-from dataclasses import dataclass
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 import pandas as pd
 
 
@@ -14,45 +15,68 @@ def feet_and_inches(inches: int) -> str:
     return f'{feet}{remaining_inches:02d}'
 
 
+def height_in_inches(height) -> Optional[int]:
+    """Takes '3400.0', '2802', or '33' 11"' and converts in to inches of type int (None if it can't be converted)"""
+    try:
+        # Check if height is in the format of feet and inches
+        if "'" in str(height):
+            feet, inches = height.split("'", 1)
+            # Remove any additional single quotes from the inches
+            inches = inches.replace('"', '').replace("'", '')
+            return int(feet) * 12 + int(inches.strip())
+        # Convert the height to an integer
+        height = int(float(height))
+        return height // 100 * 12 + height % 100
+    except (ValueError, TypeError):
+        return None
+
+
 class AttachmentFactory:
 
-    def __init__(self):
-        self.identifier_directory = 'model/identify_attachments'
+    def __init__(self, registry: ir.IdentifierRegistry = None):
+        # Identifiers are loaded once per process by the registry instead of once per factory
+        self.registry = registry if registry is not None else ir.get_registry()
+        self.identifier_directory = self.registry.identifier_directory
         self.attachment_identifier_directory = os.path.join(self.identifier_directory, 'attachments')
-        self.comm_identifiers = self.get_identifiers('comm.txt')
-        self.power_identifiers = self.get_identifiers('power.txt')
-        self.streetlight_identifiers = self.get_identifiers('streetlight.txt')
+
+    @property
+    def comm_identifiers(self) -> List[List]:
+        return self.get_identifiers('comm.txt')
+
+    @property
+    def power_identifiers(self) -> List[List]:
+        return self.get_identifiers('power.txt')
+
+    @property
+    def streetlight_identifiers(self) -> List[List]:
+        return self.get_identifiers('streetlight.txt')
 
     def get_identifiers(self, identifier_file: str) -> List[List]:
         """Returns a list to identify attachment type"""
-        file_path = os.path.join(self.identifier_directory, identifier_file)
-        file_lines = open(file_path, 'r').readlines()
-        return [line.strip().lower().split(' ') for line in file_lines]
+        return self.registry.get_identifiers(identifier_file)
 
     @staticmethod
     def is_attachment_type(identifiers: List[List[str]], attachment_name: str) -> bool:
         """Allows for 'primary riser' to match with 'primary_riser'"""
-        for lst in identifiers:
-            if all(item in attachment_name for item in lst):
-                return True
-        return False
+        return ir.IdentifierRegistry.is_attachment_type(identifiers, attachment_name)
 
     def is_streetlight(self, attachment_name: str) -> bool:
-        return self.is_attachment_type(self.streetlight_identifiers, attachment_name)
+        return self.registry.is_type('streetlight.txt', attachment_name)
 
     def is_power(self, attachment_name: str) -> bool:
-        return self.is_attachment_type(self.power_identifiers, attachment_name)
+        return self.registry.is_type('power.txt', attachment_name)
 
     def is_comm(self, attachment_name: str) -> bool:
-        return self.is_attachment_type(self.comm_identifiers, attachment_name)
+        return self.registry.is_type('comm.txt', attachment_name)
 
     def create_attachment(self, name: str, height: str, dataframe_row) -> 'Attachment':
         """Creates an attachment of its type"""
-        if self.is_streetlight(name):
+        attachment_type = self.registry.identify(name)
+        if attachment_type == 'streetlight.txt':
             return self.create_streetlight_attachment(name, height, dataframe_row)
-        elif self.is_power(name):
+        elif attachment_type == 'power.txt':
             return self.create_power_attachment(name, height)
-        elif self.is_comm(name):
+        elif attachment_type == 'comm.txt':
             return self.create_comm_attachment(name, height)
 
     @staticmethod
@@ -89,31 +113,39 @@ class AttachmentFactory:
     def identify_comment_attachment(self, comment, sequence_number):
         comment = comment.lower()  # convert the comment to lowercase
 
-        # Filter to only .txt files
-        txt_files = [f for f in os.listdir(self.attachment_identifier_directory) if f.endswith('.txt')]
-
-        for file in txt_files:
-            with open(os.path.join(self.attachment_identifier_directory, file), 'r') as f:
-                for line in f:
-                    items = line.split()  # split line into items
-
-                    # Convert all items to lowercase
-                    items = [item.lower() for item in items]
-
-                    # If item contains '!', it must not be in comment
-                    # If item does not contain '!', it must be in comment
-                    if all(item.replace('!', '') not in comment if '!' in item else item in comment for item in items):
-                        return file[:-4]  # return the file name without '.txt'
+        # Rule files are compiled once by the registry (Same first match as scanning the files in order)
+        attachment_name = self.registry.comment_resolver.resolve(comment)
+        if attachment_name is not None:
+            return attachment_name
 
         # If no matching file found, return None
-        logging.warning(f"Pole {sequence_number}: \"{comment}\" attachment was not recognized")
+        instrumentation.count(instrumentation.UNRECOGNIZED_COMMENTS)
+        diagnostics.warn(sequence_number, diagnostics.UNRECOGNIZED_ATTACHMENT,
+                         f"\"{comment}\" attachment was not recognized")
         return comment
 
 
-@dataclass
 class Attachment(ABC):
-    name: str
-    height: str
+    """
+    Attachment on a pole
+
+    self.name: Attachment name
+    self.height: Height as it was given ('3400.0', '2802', or '33' 11"')
+    self.inches: Height in inches (Parsed once whenever height is set, setting it also updates height)
+    """
+    __slots__ = ('name', '_height', '_inches')
+
+    def __init__(self, name: str, height: str):
+        self.name = name
+        self.height = height
+
+    def __repr__(self):
+        return f"{self.__class__.__qualname__}(name={self.name!r}, height={self.height!r})"
+
+    def __eq__(self, other):
+        if other.__class__ is self.__class__:
+            return (self.name, self.height) == (other.name, other.height)
+        return NotImplemented
 
     def __lt__(self, other):
         if isinstance(other, Attachment):
@@ -131,21 +163,37 @@ class Attachment(ABC):
         if isinstance(other, Attachment):
             return self.get_height_in_inches() >= other.get_height_in_inches()
 
+    @property
+    def height(self):
+        return self._height
+
+    @height.setter
+    def height(self, height) -> None:
+        self._height = height
+        self._inches = height_in_inches(height)
+
+    @property
+    def inches(self) -> int:
+        return self.get_height_in_inches()
+
+    @inches.setter
+    def inches(self, inches: int) -> None:
+        self._height = feet_and_inches(inches)
+        self._inches = inches
+
     def get_height_in_inches(self) -> int:
-        """Takes '3400.0', '2802', or '33' 11"' and converts in to inches of type int"""
-        # Check if height is in the format of feet and inches
-        if "'" in str(self.height):
-            feet, inches = self.height.split("'", 1)
-            # Remove any additional single quotes from the inches
-            inches = inches.replace('"', '').replace("'", '')
-            total_inches = int(feet) * 12 + int(inches.strip())
-        else:
-            # Convert the height to an integer
-            self.height = int(float(self.height))
-            feet = self.height // 100
-            inches = self.height % 100
-            total_inches = feet * 12 + inches
-        return total_inches
+        """Returns the height in inches that was parsed when the height was set"""
+        if self._inches is None:
+            raise ValueError(f"{self.name} height \"{self.height}\" can't be converted to inches")
+        return self._inches
+
+    def get_violation_range(self) -> int:
+        """Furthest an attachment below can be and still be a violation"""
+        return constants.INCHES_MAX_VIOLATION_RANGE
+
+    def to_payload(self) -> tuple:
+        """Small tuple that can be sent to another process and turned back into the attachment"""
+        return self.__class__.__name__, self.name, self.height
 
     @abstractmethod
     def check_for_violation(self, other: 'Attachment') -> str:
@@ -153,6 +201,10 @@ class Attachment(ABC):
 
 
 class Power(Attachment):
+    __slots__ = ()
+
+    def get_violation_range(self) -> int:
+        return constants.INCHES_POWER_TO_COMM
 
     def check_for_violation(self, other: 'Attachment') -> str:
         # Height of both attachments in inches
@@ -169,6 +221,10 @@ class Power(Attachment):
 
 
 class Comm(Attachment):
+    __slots__ = ()
+
+    def get_violation_range(self) -> int:
+        return constants.INCHES_COMM_TO_COMM
 
     def check_for_violation(self, other: 'Attachment') -> str:
         # Height of both attachments in inches
@@ -194,18 +250,19 @@ class Comm(Attachment):
 
 
 class Streetlight(Attachment):
-    grounded: bool
-    molded: bool
+    __slots__ = ('grounded', 'molded')
 
     def __init__(self, name, height, grounded, molded):
-        self.name = name
-        self.height = height
+        super().__init__(name, height)
         self.grounded = grounded
         self.molded = molded
 
     def __repr__(self):
         return f"Streetlight(name={self.name}, height={self.height}, grounded={self.grounded}, molded={self.molded})"
 
+    def to_payload(self) -> tuple:
+        return self.__class__.__name__, self.name, self.height, self.grounded, self.molded
+
     def check_for_violation(self, other: 'Attachment') -> str:
         # Height of both attachments in inches
         self_inches = self.get_height_in_inches()
@@ -218,6 +275,9 @@ class Streetlight(Attachment):
         if is_in_range and is_comm:
             return f"VIOLATION-{other.name} is {abs(self_inches - other_inches)}\" from {self.name}"
 
+    def get_violation_range(self) -> int:
+        return self._set_violation_range()
+
     def _set_violation_range(self):
         """Sets distance comm should be from streetlight"""
         if self.grounded and self.molded:
@@ -226,3 +286,10 @@ class Streetlight(Attachment):
             return constants.INCHES_STREETLIGHT_GROUNDED_TO_COMM
         else:
             return constants.INCHES_STREETLIGHT_TO_COMM
+
+
+def from_payload(payload: tuple) -> Attachment:
+    """Turns a tuple from Attachment.to_payload back into an attachment"""
+    attachment_types = {'Power': Power, 'Comm': Comm, 'Streetlight': Streetlight}
+    attachment_type, *arguments = payload
+    return attachment_types[attachment_type](*arguments)
@@ -0,0 +1,102 @@
+"""
+Runs many input spreadsheets at once across worker processes
+
+Example of use:
+results = run_batch('user_input/', 'output/', template='PSE', mode=FORMAT)
+for result in results:
+    print(result)
+"""
+import glob
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+from view.excel_spreadsheet import ExcelFile
+import model.model as m
+
+# Modes
+FORMAT = 'format'  # CableComApp download to template
+MAKE_READY = 'make-ready'  # Template with make ready violations added
+
+INPUT_TEMPLATES = {FORMAT: 'Cable Comm App'}
+
+
+@dataclass
+class BatchJob:
+    """One input spreadsheet and where its output goes (Sent to a worker process)"""
+    input_path: str
+    output_path: str
+    template: str
+    mode: str
+    make_ready_is_included: bool = False
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one input spreadsheet"""
+    input_path: str
+    output_path: str
+    seconds: float
+    error: Optional[str] = None
+
+    def __repr__(self):
+        status = 'OK' if self.succeeded else f"FAILED\n{self.error}"
+        return f"{os.path.basename(self.input_path)}: {status} ({self.seconds:.2f}s)"
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+def find_inputs(source: str) -> List[str]:
+    """Gets all the Excel files in a folder or matching a glob pattern (Sorted so runs are repeatable)"""
+    if os.path.isdir(source):
+        source = os.path.join(source, '*.xlsx')
+    return sorted(path for path in glob.glob(source) if not os.path.basename(path).startswith('~$'))
+
+
+def create_jobs(input_paths: List[str], output_directory: str, template: str, mode: str,
+                make_ready_is_included: bool = False) -> List[BatchJob]:
+    """Each input gets its own output file named after it"""
+    jobs = []
+    for input_path in input_paths:
+        name = os.path.splitext(os.path.basename(input_path))[0]
+        output_path = os.path.join(output_directory, f"{name}_output.xlsx")
+        jobs.append(BatchJob(input_path, output_path, template, mode, make_ready_is_included))
+    return jobs
+
+
+def run_job(job: BatchJob) -> BatchResult:
+    """Runs one spreadsheet through the same model functions the GUI uses and times it"""
+    start = time.perf_counter()
+    try:
+        input_excel = ExcelFile()
+        input_excel.path = job.input_path
+        output_excel = ExcelFile()
+        output_excel.path = job.output_path
+        output_excel.template = job.template
+        if job.mode == FORMAT:
+            input_excel.template = INPUT_TEMPLATES[FORMAT]
+            m.format_to_template(input_excel, output_excel)
+        elif job.mode == MAKE_READY:
+            input_excel.template = job.template
+            m.create_make_ready_output(input_excel, output_excel, job.make_ready_is_included)
+        else:
+            raise ValueError(f"Unknown mode: {job.mode}")
+        error = None
+    except Exception:
+        error = traceback.format_exc()
+    return BatchResult(job.input_path, job.output_path, time.perf_counter() - start, error)
+
+
+def run_batch(source: str, output_directory: str, template: str = 'PSE', mode: str = FORMAT,
+              make_ready_is_included: bool = False, workers: Optional[int] = None) -> List[BatchResult]:
+    """Runs every input spreadsheet in its own worker process and returns the results in input order"""
+    os.makedirs(output_directory, exist_ok=True)
+    jobs = create_jobs(find_inputs(source), output_directory, template, mode, make_ready_is_included)
+    if workers == 1 or len(jobs) <= 1:
+        return [run_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_job, jobs))
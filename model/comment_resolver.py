@@ -0,0 +1,155 @@
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+RULE_DIRECTORY = 'model/identify_attachments/attachments'
+
+
+class CommentResolver:
+    """
+    Finds which attachment a make ready comment is talking about
+
+    Every line in the rule files is a list of words: plain words must be in the comment and words starting with '!'
+    must not be. The first matching rule (in os.listdir order of the files) wins and the file name is the attachment.
+
+    self.rule_directory: Directory of attachment rule files (One .txt file per attachment)
+    self._rules: Every rule as (attachment name, words that must match, words that must not match)
+    self._keyword_index: Maps the longest required word of a rule to the rules that need it
+    self._rules_without_keyword: Rules with no required words (These are always candidates)
+    self._matches: Remembers the result for each normalized comment
+
+    Example of use:
+    resolver = CommentResolver()
+    resolver.resolve('Move CATV 2nd Attach to')  # Returns 'catv_2nd_attach'
+    """
+
+    def __init__(self, rule_directory: str = RULE_DIRECTORY):
+        self.rule_directory = rule_directory
+        self._lock = threading.RLock()
+        self._rules: Optional[List[Tuple[str, Tuple[str, ...], Tuple[str, ...]]]] = None
+        self._keyword_index: Dict[str, List[int]] = {}
+        self._rules_without_keyword: List[int] = []
+        self._matches: Dict[str, Optional[str]] = {}
+        self._modified_times: Dict[str, float] = {}
+
+    def resolve(self, comment: str) -> Optional[str]:
+        """Returns the attachment name the comment matches or None if no rule matches"""
+        normalized_comment = self.normalize(comment)
+        try:
+            return self._matches[normalized_comment]
+        except KeyError:
+            pass
+        # Loaded under the lock so invalidate can't drop the rules before they are matched
+        with self._lock:
+            self._load()
+            attachment_name = self._match(normalized_comment)
+            self._matches[normalized_comment] = attachment_name
+        return attachment_name
+
+    @staticmethod
+    def normalize(comment: str) -> str:
+        """Lowercases and collapses whitespace (Rule words never contain whitespace so matches are unchanged)"""
+        return ' '.join(comment.lower().split())
+
+    def invalidate(self) -> None:
+        """Drops the compiled rules and remembered matches so the rule files are read again"""
+        with self._lock:
+            self._rules = None
+            self._keyword_index = {}
+            self._rules_without_keyword = []
+            self._matches = {}
+            self._modified_times = {}
+
+    def reload_if_changed(self) -> bool:
+        """Recompiles the rules if a rule file was added, removed or edited since they were loaded"""
+        with self._lock:
+            if self._rules is None:
+                return False
+            if self._get_modified_times() == self._modified_times:
+                return False
+            self.invalidate()
+            self._load()
+            return True
+
+    def _match(self, comment: str) -> Optional[str]:
+        """Only checks rules whose keyword is in the comment, in the original rule order"""
+        candidates = list(self._rules_without_keyword)
+        for keyword, rule_indexes in self._keyword_index.items():
+            if keyword in comment:
+                candidates.extend(rule_indexes)
+        for index in sorted(candidates):
+            attachment_name, required, excluded = self._rules[index]
+            if all(word in comment for word in required) and all(word not in comment for word in excluded):
+                return attachment_name
+        return None
+
+    def _load(self) -> None:
+        """Compiles every rule file into one index the first time it is needed"""
+        if self._rules is not None:
+            return
+        with self._lock:
+            if self._rules is not None:
+                return
+            self._modified_times = self._get_modified_times()
+            rules = []
+            for file in self._list_rule_files():
+                with open(os.path.join(self.rule_directory, file), 'r') as f:
+                    for line in f:
+                        items = [item.lower() for item in line.split()]
+                        required = tuple(item for item in items if '!' not in item)
+                        excluded = tuple(item.replace('!', '') for item in items if '!' in item)
+                        rules.append((file[:-4], required, excluded))
+            keyword_index: Dict[str, List[int]] = {}
+            rules_without_keyword = []
+            for index, (_, required, _) in enumerate(rules):
+                if required:
+                    keyword_index.setdefault(max(required, key=len), []).append(index)
+                else:
+                    rules_without_keyword.append(index)
+            self._keyword_index = keyword_index
+            self._rules_without_keyword = rules_without_keyword
+            self._rules = rules
+
+    def _list_rule_files(self) -> List[str]:
+        """Filter to only .txt files"""
+        return [f for f in os.listdir(self.rule_directory) if f.endswith('.txt')]
+
+    def _get_modified_times(self) -> Dict[str, float]:
+        return {file: os.path.getmtime(os.path.join(self.rule_directory, file)) for file in self._list_rule_files()}
+
+
+def _scan_rule_files(rule_directory: str, comment: str) -> Optional[str]:
+    """The original file by file scan, kept as the reference the resolver is checked against"""
+    comment = comment.lower()
+    txt_files = [f for f in os.listdir(rule_directory) if f.endswith('.txt')]
+    for file in txt_files:
+        with open(os.path.join(rule_directory, file), 'r') as f:
+            for line in f:
+                items = [item.lower() for item in line.split()]
+                if all(item.replace('!', '') not in comment if '!' in item else item in comment for item in items):
+                    return file[:-4]
+    return None
+
+
+# Test
+if __name__ == '__main__':
+    import itertools
+    import random
+
+    resolver = CommentResolver()
+
+    # Every rule line as a comment, every pair of rule lines and random word salads
+    rule_lines = []
+    for rule_file in resolver._list_rule_files():
+        with open(os.path.join(RULE_DIRECTORY, rule_file), 'r') as rule:
+            rule_lines += [line.strip().replace('!', '') for line in rule]
+    words = sorted({word for line in rule_lines for word in line.split()}) + ['Move', 'to', 'Lower', 'Raise', 'Drop']
+    comments = [f"Move {line} to" for line in rule_lines]
+    comments += [f"{a} {b}" for a, b in itertools.permutations(rule_lines, 2)]
+    rng = random.Random(0)
+    comments += [' '.join(rng.choices(words, k=rng.randint(1, 5))) for _ in range(5000)]
+    comments += ['', 'Dress Drip Loop', 'Ground Streetlight', 'Move  CATV\t2nd   Attach to']
+
+    mismatches = [c for c in comments if resolver.resolve(c) != _scan_rule_files(RULE_DIRECTORY, c)]
+    assert not mismatches, f"{len(mismatches)} comments resolved differently, first: {mismatches[:5]}"
+    print(f"Resolver matches the file scan for all {len(comments)} comments")
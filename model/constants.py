@@ -4,3 +4,10 @@ INCHES_COMM_TO_COMM = 12
 INCHES_STREETLIGHT_TO_COMM = 40
 INCHES_STREETLIGHT_GROUNDED_TO_COMM = 12
 INCHES_STREETLIGHT_GROUNDED_AND_MOLDED_TO_COMM = 4
+INCHES_MAX_VIOLATION_RANGE = max(
+    INCHES_POWER_TO_COMM,
+    INCHES_COMM_TO_COMM,
+    INCHES_STREETLIGHT_TO_COMM,
+    INCHES_STREETLIGHT_GROUNDED_TO_COMM,
+    INCHES_STREETLIGHT_GROUNDED_AND_MOLDED_TO_COMM,
+)
@@ -0,0 +1,149 @@
+import contextlib
+import contextvars
+import logging
+import logging.handlers
+import queue
+import threading
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+# Kinds of warnings
+UNRECOGNIZED_COMMENT = 'Unrecognized comment'
+UNRECOGNIZED_ATTACHMENT = 'Unrecognized attachment'
+MISSING_ATTACHMENT = 'Missing attachment'
+
+MAX_LINES_PER_KIND = 100  # Warnings of each kind written out before the rest are only counted
+
+
+class Diagnostic(NamedTuple):
+    pole: str
+    kind: str
+    message: str
+
+    def __str__(self):
+        return f"Pole {self.pole}: {self.message}"
+
+
+class DiagnosticsCollector:
+    """
+    Gathers the warnings of a job so they are written out once at the end instead of one log call each
+
+    The same warning on the same pole is only kept once (With how many times it happened).
+
+    self.counts: Times each warning happened in the order they first happened
+
+    Example of use:
+    with diagnostics.collect() as collector:
+        pole_list = m.get_pole_list_with_violations(input_excel, make_ready_is_included=True)
+    collector.get_by_kind()  # {'Unrecognized comment': 12, 'Missing attachment': 3}
+    print(collector.get_summary())
+    """
+
+    def __init__(self):
+        self.counts: Dict[Diagnostic, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.counts)
+
+    def add(self, pole: str, kind: str, message: str) -> None:
+        diagnostic = Diagnostic(str(pole), kind, message)
+        with self._lock:
+            self.counts[diagnostic] = self.counts.get(diagnostic, 0) + 1
+
+    def get_by_pole(self) -> Dict[str, List[Diagnostic]]:
+        """Warnings of each pole"""
+        by_pole = {}
+        for diagnostic in self._get_diagnostics():
+            by_pole.setdefault(diagnostic.pole, []).append(diagnostic)
+        return by_pole
+
+    def get_by_kind(self) -> Dict[str, int]:
+        """Times each kind of warning happened"""
+        by_kind = {}
+        for diagnostic, count in self._get_counts():
+            by_kind[diagnostic.kind] = by_kind.get(diagnostic.kind, 0) + count
+        return by_kind
+
+    def get_lines(self, max_lines_per_kind: Optional[int] = MAX_LINES_PER_KIND) -> List[str]:
+        """One line per warning grouped by kind (Warnings past the max of a kind are summed up in one line)"""
+        by_kind: Dict[str, List[str]] = {}
+        for diagnostic, count in self._get_counts():
+            by_kind.setdefault(diagnostic.kind, []).append(str(diagnostic) + (f" (x{count})" if count > 1 else ''))
+        lines = []
+        for kind, kind_lines in by_kind.items():
+            if max_lines_per_kind is not None and len(kind_lines) > max_lines_per_kind:
+                hidden_line = f"... and {len(kind_lines) - max_lines_per_kind} more {kind.lower()} warnings"
+                kind_lines = kind_lines[:max_lines_per_kind] + [hidden_line]
+            lines.extend(kind_lines)
+        return lines
+
+    def get_summary(self, max_lines_per_kind: Optional[int] = MAX_LINES_PER_KIND) -> str:
+        """Counts of each kind followed by the warnings (Empty if there were none)"""
+        by_kind = self.get_by_kind()
+        if not by_kind:
+            return ''
+        header = ', '.join(f"{kind}: {count}" for kind, count in by_kind.items())
+        return '\n'.join([header] + self.get_lines(max_lines_per_kind))
+
+    def flush(self, logger: Optional[logging.Logger] = None,
+              max_lines_per_kind: Optional[int] = MAX_LINES_PER_KIND) -> None:
+        """Logs every warning collected so far"""
+        logger = logger or logging.getLogger()
+        for line in self.get_lines(max_lines_per_kind):
+            logger.warning(line)
+
+    def _get_counts(self) -> List[tuple]:
+        with self._lock:
+            return list(self.counts.items())
+
+    def _get_diagnostics(self) -> List[Diagnostic]:
+        with self._lock:
+            return list(self.counts)
+
+
+# ----- Collecting ----- #
+# Each thread (And asyncio task) has its own so jobs that run at the same time don't collect each other's warnings
+_active: contextvars.ContextVar[Optional[DiagnosticsCollector]] = contextvars.ContextVar('diagnostics', default=None)
+
+
+@contextlib.contextmanager
+def collect(flush: bool = True) -> Iterator[DiagnosticsCollector]:
+    """Collects the warnings of the jobs run inside the with block on this thread (Logged once at the end if flush is
+    True)"""
+    collector = DiagnosticsCollector()
+    token = _active.set(collector)
+    try:
+        yield collector
+    finally:
+        _active.reset(token)
+        if flush:
+            collector.flush()
+
+
+def warn(pole: str, kind: str, message: str) -> None:
+    """Adds a warning to the collector (Logged straight away when nothing is collecting)"""
+    collector = _active.get()
+    if collector is None:
+        logging.warning(str(Diagnostic(str(pole), kind, message)))
+    else:
+        collector.add(pole, kind, message)
+
+
+def start_queue_logging(logger: Optional[logging.Logger] = None) -> logging.handlers.QueueListener:
+    """Moves the handlers of the logger onto a listener thread so logging never waits on file writes
+
+    Example of use:
+    logging.basicConfig(filename='model/logging/log.log', level=logging.DEBUG)
+    listener = diagnostics.start_queue_logging()
+    ...
+    listener.stop()  # Writes whatever is left in the queue
+    """
+    logger = logger or logging.getLogger()
+    handlers = list(logger.handlers)
+    log_queue = queue.SimpleQueue()
+    for handler in handlers:
+        logger.removeHandler(handler)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -1,15 +1,18 @@
 from typing import List, Dict
 import pandas as pd
 from model.pole import Pole
+from model.notes import parse_notes, reverse_parse_notes
 import openpyxl
+import model.workbook_cache as wc
+import model.template_registry as tr
+from model.template_registry import HeaderMapping, TemplateDefinition
 from abc import ABC, abstractmethod
 
 
 # ----- Static Methods ----- #
 def select_template(template: str) -> 'ExcelManager':
-    """Creates a manager instance of chosen jurisdiction"""
-    if template == 'PSE':
-        return PSEManager()
+    """Creates a manager instance of chosen template (Raises ValueError for a template that isn't declared)"""
+    return tr.get_registry().create_manager(template)
 
 
 class ExcelManager(ABC):
@@ -25,6 +28,10 @@ class ExcelManager(ABC):
     self.template_header: Stores template column headers in a list in the same order they are in the template ot be
     used to format other DataFrames to fit in the template DataFrame
     self.standard_headers: Stores template headers mapped to standard
+    self.measurement_headers: Template headers of the attachment height columns (Stored as whole numbers)
+    self.extra_headers: Standard headers added after the template headers (Not part of the template)
+    self.header_row: Row of the template the column headers are on (Data starts on the row after)
+    self.name: Name of the template the manager formats to
 
     Example of use:
     # Read excel data and format for PoleManager
@@ -54,59 +61,40 @@ class ExcelManager(ABC):
         self.reversed_map: Dict[str] = None
         self.template_headers: List[str] = None
         self.standard_headers: List[str] = None
+        self.measurement_headers: List[str] = None
+        self.extra_headers: List[str] = []
+        self.header_row: int = None
+        self.name: str = None
+        self._header_mapping: HeaderMapping = None
+        self._header_mapping_key = None
 
     def __repr__(self):
         return f"{self.df.to_string(index=False)}"
 
     def parse_column(self, column: str) -> None:
-        """Splits the notes up into attachment dictionaries"""
-        for index, row in self.df.iterrows():
-            note = row[column]
-            notes = note.split('\n')
-            parsed_note = []
-            for piece in notes:
-                part = piece.split(': ')
-                try:
-                    if part[0] != 'nan':
-                        pair = {
-                            'name': part[0],
-                            'value': part[1],
-                        }
-                        parsed_note.append(pair)
-                except IndexError:
-                    parsed_note.append(piece)
-            self.df.at[index, column] = parsed_note
+        """Splits the notes up into tuples of attachment pairs and comments"""
+        self.df[column] = parse_notes(self.df[column])
 
     def reverse_parse_column(self, column: str) -> None:
-        """Combines attachment dictionaries into a single notes field"""
-        for index, row in self.df.iterrows():
-            parsed_note = row[column]
-            if isinstance(parsed_note, list):
-                if len(parsed_note) == 0:
-                    self.df.at[index, column] = 'nan'
-                else:
-                    note = ""
-                    for item in parsed_note:
-                        if isinstance(item, dict):
-                            name = item.get('name', '')
-                            value = item.get('value', '')
-                            note += f"{name}: {value}\n"
-                        elif isinstance(item, str):
-                            note += item + "\n"
-                    self.df.at[index, column] = note.strip()
+        """Combines attachment pairs and comments into a single notes field"""
+        self.df[column] = reverse_parse_notes(self.df[column])
+
+    @property
+    def header_mapping(self) -> HeaderMapping:
+        """Compiled once for the template (Compiled again if either map is replaced or edited)"""
+        key = self._get_header_mapping_key()
+        if self._header_mapping is None or self._header_mapping_key != key:
+            self._header_mapping = HeaderMapping(self.attachment_map, self.reversed_map)
+            self._header_mapping_key = key
+        return self._header_mapping
+
+    def _get_header_mapping_key(self) -> tuple:
+        # Keyed by the contents of the maps (A new map can get the id of one that was thrown away)
+        return (tuple((self.attachment_map or {}).items()), tuple((self.reversed_map or {}).items()))
 
     def rename_header(self, attachment_name: str) -> str:
         """Renames attachments to match standard convention or template convention"""
-        try:
-            # Try to get the value from the original map
-            return self.attachment_map[attachment_name]
-        except KeyError:
-            try:
-                # If not found in the original map, try the reversed map
-                return self.reversed_map[attachment_name]
-            except KeyError:
-                # If the key is not found in either map, return the original attachment name
-                return attachment_name
+        return self.header_mapping.get(attachment_name)
 
     @abstractmethod
     def set_file_path(self, file_path: str) -> None:
@@ -121,7 +109,7 @@ class ExcelManager(ABC):
         pass
 
     @abstractmethod
-    def read_excel(self) -> None:
+    def read_excel(self, use_cache: bool = True) -> None:
         pass
 
     @abstractmethod
@@ -137,40 +125,23 @@ class ExcelManager(ABC):
         pass
 
 
-class PSEManager(ExcelManager):
-    """Extracts data from excel and formats it to PSE template"""
-    def __init__(self):
+class TemplateManager(ExcelManager):
+    """Extracts data from excel and formats it to a template declared in the templates folder"""
+    def __init__(self, definition: TemplateDefinition):
         super().__init__()
-        self.template_path = 'model/templates/PSE.xlsx'
-        self.attachment_map = {
-            'Seq #': '_title',
-            'PSE Pole #': 'pse_tag_number',
-            'Pole Type T/D': 'pse_pole_type',
-            'Pole Owner': 'jursidiction',
-            'PSE Umap': 'PSE Umap',
-            'Location': 'Location',
-            'City/Area': 'City/Area',
-            'Neutral': 'neutral_height',
-            'Secondary': 'secondary_spool.txt',
-            'Drip Loop': 'drip_loop',
-            'Secondary Riser': 'secondary_riser',
-            'Street Light': 'streetlight',
-            'CATV': 'catv',
-            'TelCo': 'telco',
-            'Fiber': 'fiber',
-            'Request Attachment': 'Request Attachment',
-            'Make Ready Notes': 'make_ready',  # Not in the spreadsheet but is custom
-            'Mid Span Violation Notes': 'Mid Span Violation Notes',
-            'PSE Field Notes': 'additional_measurements'
-        }
+        self.name = definition.name
+        self.template_path = definition.template_path
+        # Copied so changing a manager's map or headers doesn't change the definition every other job shares
+        self.attachment_map = dict(definition.attachment_map)
         self.reversed_map = {v: k for k, v in self.attachment_map.items()}
-        self.template_headers = [
-            'Seq #', 'PSE Pole #', 'Pole Type T/D', 'Pole Owner', 'PSE Umap', 'Location',
-            'City/Area', 'Neutral', 'Secondary', 'Drip Loop', 'Secondary Riser',
-            'Street Light', 'CATV', 'TelCo', 'Fiber', 'Requested Attachment',
-            'Make Ready Notes', 'Mid Span Violation Notes', 'PSE Field Notes'
-        ]
+        # The registry compiles each template's mapping once per process
+        self._header_mapping = tr.get_registry().get_header_mapping(definition.name)
+        self._header_mapping_key = self._get_header_mapping_key()
+        self.template_headers = list(definition.template_headers)
         self.standard_headers = [self.rename_header(header) for header in self.template_headers]
+        self.measurement_headers = list(definition.measurement_headers)
+        self.extra_headers = list(definition.extra_headers)
+        self.header_row = definition.header_row
 
     def set_file_path(self, file_path: str) -> None:
         """Sets the file path to get DataFrame from"""
@@ -191,9 +162,10 @@ class PSEManager(ExcelManager):
         self.df = data_frame
         self._format_measurements()
 
-    def read_excel(self) -> None:
-        """Takes data from excel file to create a DataFrame"""
-        self.df = pd.read_excel(self.file_path, skiprows=8).astype(str)
+    def read_excel(self, use_cache: bool = True) -> None:
+        """Takes data from excel file to create a DataFrame (Reuses the last parse if the file hasn't changed)"""
+        self.df = wc.get_cache().read_excel(self.file_path, use_cache=use_cache,
+                                            skiprows=self.header_row - 1).astype(str)
         self._format_measurements()
 
     def read_excel_in_read_mode(self) -> None:
@@ -204,8 +176,8 @@ class PSEManager(ExcelManager):
         ws = wb.active
         # Get data from worksheet
         data = ws.values
-        # Skip the first 8 rows
-        for _ in range(8):
+        # Skip the rows above the headers
+        for _ in range(self.header_row - 1):
             next(data)
         # Get column names from the next line of data
         cols = next(data)
@@ -225,44 +197,46 @@ class PSEManager(ExcelManager):
 
     def format(self) -> None:
         """Changes DataFrame into a standard or template DataFrame that is usable in other classes"""
-        formatted_df = pd.DataFrame()
-        for column in self.df:
-            formatted_df[self.rename_header(column)] = self.df[column]
-        self.df = formatted_df
+        self.df = self.header_mapping.apply(self.df)
 
     def create_output(self, file_path: str) -> None:
-        """Combines template DataFrame with make manipulated DataFrame"""
-        self.df.to_excel('model/temp/temp.xlsx', sheet_name='Sheet1', index=False)
-
-        # Load the source workbook
-        source_wb = openpyxl.load_workbook('model/temp/temp.xlsx')
-        source_sheet = source_wb.active
-
-        # Load the destination workbook
-        destination_wb = openpyxl.load_workbook(self.template_path)
+        """Writes the DataFrame straight into the template under the template headers"""
+        # Load the destination workbook (The template file is only read from disk once per process)
+        destination_wb = tr.get_registry().load_template_workbook(self.template_path)
         destination_sheet = destination_wb.active
 
-        # Copy cells from source to destination
-        for row in source_sheet.iter_rows(min_row=2, min_col=1):
-            for cell in row:
-                destination_sheet.cell(row=cell.row + 8, column=cell.column, value=cell.value)
-
-        # Copy cells T1 and U1 from source to T9 and U9 in destination (Grounded and Molded headers)
-        destination_sheet['T9'] = source_sheet['T1'].value
-        destination_sheet['U9'] = source_sheet['U1'].value
+        # Empty cells become None so they stay empty (Same as writing the DataFrame with to_excel)
+        values = self.df.astype(object).where(self.df.notna(), None)
+
+        # Write each row of the DataFrame under the headers a whole row at a time (Rows the template already has keep
+        # their formatting and the rest are appended after them)
+        rows = values.itertuples(index=False, name=None)
+        first_row = self.header_row + 1
+        template_row_count = min(len(values), max(destination_sheet.max_row - self.header_row, 0))
+        if template_row_count and len(values.columns):
+            template_rows = destination_sheet.iter_rows(min_row=first_row, max_row=first_row + template_row_count - 1,
+                                                        max_col=len(values.columns))
+            for cells, row in zip(template_rows, rows):
+                for cell, value in zip(cells, row):
+                    cell.value = value
+        for row in rows:
+            destination_sheet.append(row)
+
+        # Columns after the template headers get their header too (Grounded and Molded go in T9 and U9)
+        extra_headers = list(self.df.columns)[len(self.template_headers):]
+        for column_number, header in enumerate(extra_headers, start=len(self.template_headers) + 1):
+            destination_sheet.cell(row=self.header_row, column=column_number, value=header)
 
         # Save the destination workbook
         destination_wb.save(file_path)
 
     def _format_measurements(self):
         """Formats attachment heights to not include decimal"""
-        self.df['Neutral'] = pd.to_numeric(self.df['Neutral'], errors='coerce').astype('Int64')
-        self.df['Secondary'] = pd.to_numeric(self.df['Secondary'], errors='coerce').astype('Int64')
-        self.df['Drip Loop'] = pd.to_numeric(self.df['Drip Loop'], errors='coerce').astype('Int64')
-        self.df['Secondary Riser'] = pd.to_numeric(self.df['Secondary Riser'], errors='coerce').astype('Int64')
-        self.df['Street Light'] = pd.to_numeric(self.df['Street Light'], errors='coerce').astype('Int64')
-        self.df['CATV'] = pd.to_numeric(self.df['CATV'], errors='coerce').astype('Int64')
-        self.df['TelCo'] = pd.to_numeric(self.df['TelCo'], errors='coerce').astype('Int64')
-        self.df['Fiber'] = pd.to_numeric(self.df['Fiber'], errors='coerce').astype('Int64')
-        self.df['Requested Attachment'] = pd.to_numeric(self.df['Requested Attachment'],
-                                                        errors='coerce').astype('Int64')
+        for header in self.measurement_headers:
+            self.df[header] = pd.to_numeric(self.df[header], errors='coerce').astype('Int64')
+
+
+class PSEManager(TemplateManager):
+    """Extracts data from excel and formats it to PSE template"""
+    def __init__(self):
+        super().__init__(tr.get_registry().get_definition('PSE'))
@@ -1,18 +1,78 @@
-from typing import List
+from dataclasses import dataclass
+from typing import Dict, List
 import numpy as np
 import pandas as pd
 from model.excel_manager import ExcelManager
+import model.workbook_cache as wc
 from model.pole import Pole
 
 
+# Column roles in a CableComApp download
+ATTACHMENT_COLUMN_RANGE = ('primary_power', 'comm_3')  # First and last attachment height columns
+ATTACHMENT_COLUMN_POSITIONS = slice(48, 83)  # Used when a download doesn't have the attachment range headers
+FLAG_COLUMNS = {'streetlight_grounded': 'grounded', 'streetlight_molded': 'molded'}
+NOTE_COLUMNS = ['additional_measurements']
+ID_COLUMNS = ['_title', 'pse_tag_number']
+
+
+@dataclass
+class ColumnRoles:
+    """
+    What each column of a CableComApp download holds (Inferred once from the header)
+
+    self.attachments: Attachment height columns
+    self.flags: Yes or no columns that are kept as they are (Mapped to the names the PoleManager class uses)
+    self.notes: Text columns that are parsed for more attachments
+    self.ids: Text columns that identify the pole
+    """
+    attachments: List[str]
+    flags: Dict[str, str]
+    notes: List[str]
+    ids: List[str]
+
+
 # ----- Static Methods ----- #
-def convert_unconvertible_to_na(val):
-    """This is used to convert a DataFrame to only contain int values"""
-    try:
-        val = int(val)
-    except ValueError:
-        return np.nan
-    return val
+def infer_column_roles(columns: pd.Index) -> ColumnRoles:
+    """Finds the attachment, flag, notes and id columns from the header"""
+    first, last = ATTACHMENT_COLUMN_RANGE
+    if first in columns and last in columns:
+        attachments = columns[columns.get_loc(first):columns.get_loc(last) + 1]
+    else:
+        attachments = columns[ATTACHMENT_COLUMN_POSITIONS]
+    return ColumnRoles(
+        attachments=list(attachments),
+        flags={column: name for column, name in FLAG_COLUMNS.items() if column in columns},
+        notes=[column for column in NOTE_COLUMNS if column in columns],
+        ids=[column for column in ID_COLUMNS if column in columns],
+    )
+
+
+def get_attachment_notes(attachment_df: pd.DataFrame) -> pd.Series:
+    """Joins the filled in attachments of each row into 'name: height' lines (Rows without any are left out)"""
+    is_filled = attachment_df.notna().to_numpy()
+    # nonzero is row major so the lines of each row stay in column order
+    rows, columns = np.nonzero(is_filled)
+    if len(rows) == 0:
+        return pd.Series(dtype=object)
+    names = pd.Series(attachment_df.columns[columns].astype(str))
+    heights = pd.Series(attachment_df.to_numpy(dtype=object)[rows, columns]).astype(str)
+    lines = (names + ': ' + heights).tolist()
+    # Each row's lines are next to each other so they are joined between the first line of each row
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    ends = np.r_[starts[1:], len(rows)]
+    return pd.Series(['\n'.join(lines[start:end]) for start, end in zip(starts, ends)],
+                     index=attachment_df.index[rows[starts]], dtype=object)
+
+
+def to_whole_numbers(column: pd.Series) -> pd.Series:
+    """Converts a column to whole numbers in one vectorized pass (<NA> for anything that isn't a number)"""
+    if pd.api.types.is_datetime64_any_dtype(column) or pd.api.types.is_timedelta64_dtype(column):
+        return pd.Series(pd.NA, index=column.index, dtype='Int64')
+    numbers = pd.to_numeric(column, errors='coerce')
+    if pd.api.types.is_bool_dtype(numbers) or pd.api.types.is_integer_dtype(numbers):
+        return numbers.astype('Int64')
+    numbers = np.trunc(numbers.astype('float64').replace([np.inf, -np.inf], np.nan))
+    return numbers.astype('Int64')
 
 
 class CableComAppManager:
@@ -24,6 +84,7 @@ class CableComAppManager:
     self.attachment_df: Stores all the attachments of the DataFrame as int values to help format to template
     self.make_ready_df: Stores all the necessary info in a DataFrame that the PoleManager class can use to find make
     ready violations
+    self.column_roles: Attachment, flag, notes and id columns found in the header when the file was read
     self.excel_manager: Has a headers list and a renaming headers method used to convert self.df to a DataFrame that
     fits the given template
 
@@ -53,6 +114,7 @@ class CableComAppManager:
         self.df = None
         self.attachment_df = None
         self.make_ready_df = None
+        self.column_roles: ColumnRoles = None
         self.excel_manager: ExcelManager() = None
 
     def __repr__(self):
@@ -74,28 +136,29 @@ class CableComAppManager:
             else:
                 self.df.at[index, 'make_ready'] += "\n" + lst[index].make_ready
 
-    def read_excel(self) -> None:
+    def read_excel(self, use_cache: bool = True) -> None:
         """Takes data from excel file to create a regular DataFrame and make_ready only DataFrame"""
-        # Stores the raw data in DataFrame
-        dataframe = pd.read_excel(self.file_path, skiprows=0)
-        # Stores DataFrame with all string values
-        self.df = dataframe.astype(str)
-        # Gets an attachment only DataFrame and converts values to integers (For proper formatting in template)
-        self.attachment_df = dataframe.iloc[:, 48:83].apply(pd.to_numeric, errors='coerce').astype('Int64')
-        # Stores an int only DataFrame to identify attachments
-        self.make_ready_df = dataframe.applymap(convert_unconvertible_to_na).astype('Int64')
-        # Merges attachment DataFrame into main DataFrame (For proper formatting in template)
-        self.df[self.df.columns[48:83]] = self.df[self.df.columns[48:83]].apply(pd.to_numeric,
-                                                                                errors='coerce').astype('Int64')
-
-        # Changes column names to grounded and molded (This is to prevent this from being seen as an attachment)
-        self.make_ready_df = self.make_ready_df.rename(columns={'streetlight_grounded': 'grounded',
-                                                                'streetlight_molded': 'molded'})
-        # Adds necessary info that got erased back into make ready DataFrame
-        self.make_ready_df['grounded'] = dataframe['streetlight_grounded'].astype('object')
-        self.make_ready_df['molded'] = dataframe['streetlight_molded'].astype('object')
-        self.make_ready_df['additional_measurements'] = dataframe['additional_measurements'].astype(str)
-        self.make_ready_df['_title'] = dataframe['_title'].astype(str)
+        # Stores the raw data in DataFrame (Reuses the last parse if the file hasn't changed)
+        dataframe = wc.get_cache().read_excel(self.file_path, use_cache=use_cache, skiprows=0)
+        self.column_roles = infer_column_roles(dataframe.columns)
+        roles = self.column_roles
+
+        # Converts each column to whole numbers once (Every other DataFrame is a selection of this one)
+        numbers = pd.DataFrame({column: to_whole_numbers(dataframe[column]) for column in dataframe.columns})
+
+        # Gets an attachment only DataFrame (For proper formatting in template)
+        self.attachment_df = numbers[roles.attachments]
+        # Stores DataFrame with string values and whole number attachments (For proper formatting in template)
+        text_columns = [column for column in dataframe.columns if column not in set(roles.attachments)]
+        text = dataframe[text_columns].astype(str)
+        self.df = pd.concat([text, self.attachment_df], axis=1)[dataframe.columns]
+
+        # Stores an int only DataFrame to identify attachments with the necessary info added back
+        self.make_ready_df = numbers.rename(columns=roles.flags)
+        for column, name in roles.flags.items():
+            self.make_ready_df[name] = dataframe[column].astype('object')
+        for column in roles.notes + roles.ids:
+            self.make_ready_df[column] = text[column]
 
     def format_to_template(self):
         """Formats DataFrame to fit in template"""
@@ -106,38 +169,29 @@ class CableComAppManager:
         # Any attachments that don't have columns get put in the additional attachments column
         self._add_additional_attachments()
         # Maps all the header names to match template headers
-        formatted_df = pd.DataFrame()
-        for column in self.df:
-            formatted_df[self.excel_manager.rename_header(column)] = self.df[column]
-        self.df = formatted_df
+        self.df = self.excel_manager.header_mapping.apply(self.df)
 
         # Add grounded and molded to the end (Not part of the template)
-        self.df['grounded'] = self.make_ready_df['grounded']
-        self.df['molded'] = self.make_ready_df['molded']
+        for header in self.excel_manager.extra_headers:
+            self.df[header] = self.make_ready_df[header]
 
     def _add_missing_columns(self, column_headers: List[str]):
         """Adds missing columns to DataFrame that are in template"""
-        for col in column_headers:
-            if col not in self.df.columns:
-                self.df[col] = None
+        missing_columns = [col for col in column_headers if col not in self.df.columns]
+        if missing_columns:
+            # Added together so the DataFrame is only copied once
+            empty_df = pd.DataFrame({col: [None] * len(self.df) for col in missing_columns}, index=self.df.index,
+                                    dtype=object)
+            self.df = pd.concat([self.df, empty_df], axis=1)
         return self.df
 
     def _add_additional_attachments(self):
         """Takes any attachments that don't have a column and put it in additional notes"""
         # Remove columns with the specified header names
         self.attachment_df = self.attachment_df.drop(columns=self.excel_manager.standard_headers, errors='ignore')
-        # Loop through rows
-        for i in self.attachment_df.index:
-            # Loop through columns
-            for j in self.attachment_df.columns:
-                # Check if value is not NaN
-                if pd.notna(self.attachment_df.at[i, j]):
-                    # Create the string
-                    note = f"{j}: {self.attachment_df.at[i, j]}"
-                    # Check if 'additional_notes' is NaN
-                    if self.df.at[i, 'additional_measurements'] == 'nan':
-                        # If it is, set the value as the new string
-                        self.df.at[i, 'additional_measurements'] = note
-                    else:
-                        # If it's not, append the new string
-                        self.df.at[i, 'additional_measurements'] += '\n' + note
+        notes = get_attachment_notes(self.attachment_df)
+        if notes.empty:
+            return
+        # Set the notes of rows without additional measurements and add a new line for the rest
+        existing = self.df.loc[notes.index, 'additional_measurements']
+        self.df.loc[notes.index, 'additional_measurements'] = notes.where(existing == 'nan', existing + '\n' + notes)
@@ -0,0 +1,129 @@
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+from model.comment_resolver import CommentResolver
+
+IDENTIFIER_DIRECTORY = 'model/identify_attachments'
+IDENTIFIER_FILES = ('streetlight.txt', 'power.txt', 'comm.txt')  # In the order attachments are identified
+
+
+class IdentifierRegistry:
+    """
+    Loads the attachment identifier files once so every AttachmentFactory can share them
+
+    self.identifier_directory: Directory holding comm.txt, power.txt and streetlight.txt
+    self._identifiers: Compiled identifiers for each file (Each line becomes a tuple of lowercase words)
+    self._modified_times: Modified time of each identifier file when it was loaded (Used to hot reload)
+    self._type_cache: Remembers which identifier file matched an attachment name
+    self._generation: Goes up each time the identifiers are dropped (Matches made with older ones aren't cached)
+    self.comment_resolver: Compiled rules from the attachments folder used to identify make ready comments
+
+    Example of use:
+    registry = get_registry()
+    registry.identify('catv_2nd_attach')  # Returns 'comm.txt'
+    registry.reload_if_changed()  # Reloads if any identifier file was edited
+    """
+
+    def __init__(self, identifier_directory: str = IDENTIFIER_DIRECTORY):
+        self.identifier_directory = identifier_directory
+        self._lock = threading.RLock()
+        self._identifiers: Optional[Dict[str, Tuple[Tuple[str, ...], ...]]] = None
+        self._modified_times: Dict[str, float] = {}
+        self._type_cache: Dict[str, Optional[str]] = {}
+        self._generation = 0
+        self.comment_resolver = CommentResolver(os.path.join(identifier_directory, 'attachments'))
+
+    def get_identifiers(self, identifier_file: str) -> List[List[str]]:
+        """Returns a list to identify attachment type"""
+        return [list(identifier) for identifier in self._get_compiled()[identifier_file]]
+
+    def identify(self, attachment_name: str) -> Optional[str]:
+        """Returns the identifier file that matches the attachment name or None if nothing matches"""
+        try:
+            return self._type_cache[attachment_name]
+        except KeyError:
+            pass
+        # Matched without the lock so threads don't wait on each other (Only cached if nothing reloaded meanwhile)
+        generation = self._generation
+        compiled = self._get_compiled()
+        identifier_file = next(
+            (file for file in IDENTIFIER_FILES if self.is_attachment_type(compiled[file], attachment_name)),
+            None
+        )
+        with self._lock:
+            if generation == self._generation:
+                self._type_cache[attachment_name] = identifier_file
+        return identifier_file
+
+    def is_type(self, identifier_file: str, attachment_name: str) -> bool:
+        """Checks an attachment name against a single identifier file"""
+        return self.is_attachment_type(self._get_compiled()[identifier_file], attachment_name)
+
+    @staticmethod
+    def is_attachment_type(identifiers, attachment_name: str) -> bool:
+        """Allows for 'primary riser' to match with 'primary_riser'"""
+        for identifier in identifiers:
+            if all(item in attachment_name for item in identifier):
+                return True
+        return False
+
+    def invalidate(self) -> None:
+        """Drops the loaded identifiers so they get read again on the next lookup"""
+        with self._lock:
+            self._identifiers = None
+            self._modified_times = {}
+            self._type_cache = {}
+            self._generation += 1
+            self.comment_resolver.invalidate()
+
+    def reload_if_changed(self) -> bool:
+        """Reloads the identifiers and comment rules if any of their files changed on disk since they were loaded"""
+        with self._lock:
+            comment_rules_reloaded = self.comment_resolver.reload_if_changed()
+            if self._identifiers is None:
+                return comment_rules_reloaded
+            if self._get_modified_times() == self._modified_times:
+                return comment_rules_reloaded
+            self._identifiers = None
+            self._type_cache = {}
+            self._generation += 1
+            self._get_compiled()
+            return True
+
+    def _get_compiled(self) -> Dict[str, Tuple[Tuple[str, ...], ...]]:
+        """Loads and compiles the identifier files the first time they are needed"""
+        identifiers = self._identifiers
+        if identifiers is None:
+            with self._lock:
+                if self._identifiers is None:
+                    self._modified_times = self._get_modified_times()
+                    self._identifiers = {file: self._read_identifier_file(file) for file in IDENTIFIER_FILES}
+                identifiers = self._identifiers
+        return identifiers
+
+    def _read_identifier_file(self, identifier_file: str) -> Tuple[Tuple[str, ...], ...]:
+        """Each line in the file becomes a tuple of lowercase words"""
+        file_path = os.path.join(self.identifier_directory, identifier_file)
+        with open(file_path, 'r') as f:
+            return tuple(tuple(line.strip().lower().split(' ')) for line in f.readlines())
+
+    def _get_modified_times(self) -> Dict[str, float]:
+        return {
+            file: os.path.getmtime(os.path.join(self.identifier_directory, file))
+            for file in IDENTIFIER_FILES
+        }
+
+
+# ----- Process-wide registry ----- #
+_registry: Optional[IdentifierRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> IdentifierRegistry:
+    """Returns the registry shared by the whole process"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = IdentifierRegistry()
+    return _registry
@@ -0,0 +1,91 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass
+from typing import Dict
+import model.identifier_registry as ir
+import model.workbook_cache as wc
+
+# Bump when a change to the violation rules should throw away every stored result
+RESULTS_VERSION = 1
+
+
+@dataclass
+class IncrementalReport:
+    """
+    How much of an incremental run was recomputed
+
+    self.pole_count: Poles in the workbook
+    self.recomputed_count: Poles that were new or changed since the last run
+    """
+    pole_count: int
+    recomputed_count: int
+
+    @property
+    def reused_count(self) -> int:
+        return self.pole_count - self.recomputed_count
+
+    def __str__(self):
+        return f"Recomputed {self.recomputed_count} of {self.pole_count} poles ({self.reused_count} reused)"
+
+
+class ResultStore:
+    """
+    Make ready of each pole from the last run of a workbook keyed by a fingerprint of the pole's row
+
+    Stored next to the parsed workbooks so it shares the workbook cache size limit and is removed by
+    WorkbookCache.clear().
+
+    self.file_path: Workbook the results are for
+    self.store_path: Pickle file the results are saved to
+    self.results: Make ready by pole fingerprint
+
+    Example of use:
+    store = ResultStore('user_input/pole_data.xlsx')
+    report = poles.get_all_violations_incremental(store, make_ready_is_included=False)
+    print(report)  # Recomputed 2 of 5000 poles (4998 reused)
+    """
+
+    def __init__(self, file_path: str, cache_directory: str = wc.CACHE_DIRECTORY):
+        self.file_path = file_path
+        key = hashlib.blake2b(os.path.abspath(file_path).encode(), digest_size=16).hexdigest()
+        self.store_path = os.path.join(cache_directory, f"{key}.violations.pkl")
+        self.results: Dict[str, str] = self._load()
+
+    def save(self) -> None:
+        """Writes the results to a temp file first so other processes never read half of them"""
+        directory = os.path.dirname(self.store_path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(self.results, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.store_path)
+        except OSError:
+            # Storing results is only a speed up so a read only or full disk isn't an error
+            pass
+
+    def _load(self) -> Dict[str, str]:
+        try:
+            with open(self.store_path, 'rb') as f:
+                results = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return {}
+        return results if isinstance(results, dict) else {}
+
+
+# ----- Static Methods ----- #
+def get_context(make_ready_is_included: bool, identifier_directory: str = ir.IDENTIFIER_DIRECTORY) -> str:
+    """Everything besides the row that changes a pole's violations (Options and edits to the identifier files)"""
+    modified_times = []
+    for directory, _, files in os.walk(identifier_directory):
+        for file in sorted(files):
+            file_path = os.path.join(directory, file)
+            modified_times.append((file_path, os.path.getmtime(file_path)))
+    return repr((RESULTS_VERSION, make_ready_is_included, sorted(modified_times)))
+
+
+def fingerprint_row(row, context: str) -> str:
+    """Hash of every field of the row (Heights, flags, notes and make ready comments) and the context"""
+    return hashlib.blake2b(repr((context, tuple(row.items()))).encode(), digest_size=16).hexdigest()
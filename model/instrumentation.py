@@ -0,0 +1,155 @@
+import contextlib
+import contextvars
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Dict, Iterator, Optional
+
+# Counters
+POLES = 'poles'
+ATTACHMENTS = 'attachments'
+COMMENTS = 'comments'
+UNRECOGNIZED_COMMENTS = 'unrecognized_comments'
+VIOLATIONS = 'violations'
+
+PROFILE_LINE_COUNT = 30  # Functions kept from the profile (Sorted by cumulative time)
+
+# Returned by stage() while nothing is being recorded (nullcontext can be entered any number of times)
+_NULL_STAGE = contextlib.nullcontext()
+
+
+class Instrumentation:
+    """
+    Time spent in each stage of a job and counts of what the job went through
+
+    self.timings: Seconds spent in each stage (Stages that run more than once add up)
+    self.calls: Times each stage ran
+    self.counters: Poles, attachments, comments, unrecognized comments and violations
+    self.profile: Whether the job is profiled with cProfile
+    self.trace_memory: Whether memory is traced with tracemalloc
+    self.profile_stats: Functions that took the most time (Once recording stops and only if profiled)
+    self.peak_memory: Most bytes allocated at once (Once recording stops and only if memory was traced)
+
+    Example of use:
+    with instrumentation.record(profile=True) as run:
+        pole_list = m.get_pole_list_with_violations(input_excel, make_ready_is_included=True)
+    run.timings  # {'read': 0.42, 'format': 0.01, ...}
+    run.counters  # {'poles': 900, 'attachments': 6120, ...}
+    run.to_json('output/timings.json')
+    """
+
+    def __init__(self, profile: bool = False, trace_memory: bool = False):
+        self.timings: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.profile_stats: Optional[str] = None
+        self.peak_memory: Optional[int] = None
+        self.profiler: Optional[cProfile.Profile] = None
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Times the code inside the with block as a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.timings[name] = self.timings.get(name, 0.0) + elapsed
+                self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def start(self) -> None:
+        """Starts the profiler and memory tracing if they were asked for"""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if self.profile:
+            # cProfile only sees the thread it was started on
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop(self) -> None:
+        """Stops the profiler and memory tracing and keeps their results"""
+        if self.profiler is not None:
+            self.profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(self.profiler, stream=stream).sort_stats('cumulative').print_stats(PROFILE_LINE_COUNT)
+            self.profile_stats = stream.getvalue()
+        if self.trace_memory and tracemalloc.is_tracing():
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                'timings': {name: round(seconds, 6) for name, seconds in self.timings.items()},
+                'calls': dict(self.calls),
+                'counters': dict(self.counters),
+                'peak_memory': self.peak_memory,
+                'profile': self.profile_stats,
+            }
+
+    def to_json(self, file_path: Optional[str] = None) -> str:
+        """Returns the results as JSON (And writes them to the file if one is given)"""
+        text = json.dumps(self.to_dict(), indent=2)
+        if file_path is not None:
+            with open(file_path, 'w') as f:
+                f.write(text)
+        return text
+
+
+# ----- Recording ----- #
+# Each thread (And asyncio task) has its own so jobs that run at the same time aren't timed together
+_active: contextvars.ContextVar[Optional[Instrumentation]] = contextvars.ContextVar('instrumentation', default=None)
+
+
+@contextlib.contextmanager
+def record(profile: bool = False, trace_memory: bool = False) -> Iterator[Instrumentation]:
+    """Records every stage and counter of the jobs run inside the with block on this thread"""
+    instrumentation = Instrumentation(profile=profile, trace_memory=trace_memory)
+    token = _active.set(instrumentation)
+    instrumentation.start()
+    try:
+        yield instrumentation
+    finally:
+        instrumentation.stop()
+        _active.reset(token)
+
+
+def get_active() -> Optional[Instrumentation]:
+    """Instrumentation being recorded to (None when nothing is recording)"""
+    return _active.get()
+
+
+def is_enabled() -> bool:
+    """Lets callers skip work that is only needed for a counter"""
+    return _active.get() is not None
+
+
+def stage(name: str):
+    """Times a stage if something is recording (Otherwise an empty with block)"""
+    instrumentation = _active.get()
+    if instrumentation is None:
+        return _NULL_STAGE
+    return instrumentation.stage(name)
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Adds to a counter if something is recording"""
+    instrumentation = _active.get()
+    if instrumentation is not None:
+        instrumentation.count(name, amount)
@@ -0,0 +1,73 @@
+import threading
+from typing import Callable, Optional
+
+# Called with (stage, done, total) as a job runs (A total of 0 means the total isn't known yet)
+ProgressCallback = Callable[[str, int, int], None]
+
+
+class JobCancelled(Exception):
+    """Raised by a progress callback to stop a job"""
+
+
+class Progress:
+    """
+    Progress callback that stores the latest progress so another thread can poll it
+
+    Example of use:
+    progress = Progress()
+    job = BackgroundJob(m.get_pole_list_with_violations, input_excel, False, progress=progress)
+    progress.get()  # ('Processing poles', 120, 900)
+    progress.cancel()  # The job raises JobCancelled the next time it reports progress
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+        self.stage = ''
+        self.done = 0
+        self.total = 0
+
+    def __call__(self, stage: str, done: int, total: int) -> None:
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+        with self._lock:
+            self.stage = stage
+            self.done = done
+            self.total = total
+
+    def get(self) -> tuple:
+        """Returns (stage, done, total)"""
+        with self._lock:
+            return self.stage, self.done, self.total
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+
+class BackgroundJob:
+    """
+    Runs a model function on a worker thread so the GUI stays responsive
+
+    self.result: What the function returned (Once it is done)
+    self.error: Exception the function raised (JobCancelled if it was cancelled)
+    """
+
+    def __init__(self, function: Callable, *args, **kwargs):
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, args=(function, args, kwargs), daemon=True)
+        self._thread.start()
+
+    def _run(self, function: Callable, args: tuple, kwargs: dict) -> None:
+        try:
+            self.result = function(*args, **kwargs)
+        except BaseException as error:
+            self.error = error
+
+    @property
+    def is_done(self) -> bool:
+        return not self._thread.is_alive()
@@ -1,41 +1,179 @@
-from typing import List
+import logging
+from typing import Iterable, Iterator, List, Optional, Tuple
 from view.excel_spreadsheet import ExcelFile
-from model.pole_manager import PoleManager
+from model.jobs import ProgressCallback
+from model.pole_manager import PoleManager, VECTORIZED_POLE_COUNT
 from model.pole import Pole
 import model.excel_manager as em
-import model.format_fulcrum as ff
+import model.incremental as inc
+import model.instrumentation as instrumentation
+import model.streaming as streaming
 
+# Progress stages
+READING_ROWS = 'Reading rows'
+PROCESSING_POLES = 'Processing poles'
+WRITING_OUTPUT = 'Writing output'
+
+
+# ----- Static Methods ----- #
+def report(progress: Optional[ProgressCallback], stage: str, done: int, total: int) -> None:
+    """Calls the progress callback if there is one"""
+    if progress is not None:
+        progress(stage, done, total)
+
+
+def _pole_progress(progress: Optional[ProgressCallback], step: int, step_count: int):
+    """PoleManager progress for one of several passes over the poles as overall 'Processing poles' progress"""
+    if progress is None:
+        return None
+    return lambda done, total: progress(PROCESSING_POLES, step * total + done, step_count * total)
+
+
+def _count_progress(items: Iterable, progress: Optional[ProgressCallback], stage: str) -> Iterator:
+    """Reports each item as it goes by (For streams where the total isn't known)"""
+    for count, item in enumerate(items, start=1):
+        report(progress, stage, count, 0)
+        yield item
+
+
+def _count_poles(pole_list: List[Pole], make_ready_is_included: bool, count_attachments: bool) -> None:
+    """Adds the poles, comments, attachments and violations of a job to the instrumentation counters"""
+    # Skipped entirely when nothing is recording
+    if not instrumentation.is_enabled():
+        return
+    instrumentation.count(instrumentation.POLES, len(pole_list))
+    if make_ready_is_included:
+        instrumentation.count(instrumentation.COMMENTS, sum(len(pole.row['make_ready']) for pole in pole_list))
+    if count_attachments:
+        instrumentation.count(instrumentation.ATTACHMENTS, sum(len(pole.attachment_list) for pole in pole_list))
+    instrumentation.count(instrumentation.VIOLATIONS, sum(len(pole.make_ready.splitlines()) for pole in pole_list
+                                                          if pole.make_ready))
+
+
+def _count_streamed_poles(poles: Iterable[Pole]) -> Iterator[Pole]:
+    """Adds each pole and its violations to the instrumentation counters as it goes by"""
+    for pole in poles:
+        instrumentation.count(instrumentation.POLES)
+        if pole.make_ready:
+            instrumentation.count(instrumentation.VIOLATIONS, len(pole.make_ready.splitlines()))
+        yield pole
+
+
+def _read_template_excel(input_excel: ExcelFile, progress: Optional[ProgressCallback],
+                         use_cache: bool) -> em.ExcelManager:
+    """Reads a template spreadsheet and parses the notes for the PoleManager class"""
+    report(progress, READING_ROWS, 0, 0)
+    excel_manager = em.select_template(input_excel.template)
+    excel_manager.set_file_path(input_excel.path)
+    with instrumentation.stage('read'):
+        excel_manager.read_excel(use_cache=use_cache)
+    with instrumentation.stage('format'):
+        excel_manager.format()
+    with instrumentation.stage('parse_column'):
+        excel_manager.parse_column('additional_measurements')
+        excel_manager.parse_column('make_ready')
+    row_count = len(excel_manager.df)
+    report(progress, READING_ROWS, row_count, row_count)
+    return excel_manager
+
+
+def format_to_template(input_excel: ExcelFile, output_excel: ExcelFile,
+                       progress: Optional[ProgressCallback] = None, use_cache: bool = True) -> None:
+    """Creates a formatted Excel output using input Excel (use_cache=False always parses the input again)"""
+    # Only the Format job needs the CableComApp manager (And the numpy and pandas code it brings in)
+    import model.format_fulcrum as ff
 
-def format_to_template(input_excel: ExcelFile, output_excel: ExcelFile) -> None:
-    """Creates a formatted Excel output using input Excel"""
     # Create spreadsheet from downloaded data
+    report(progress, READING_ROWS, 0, 0)
     excel_manager = em.select_template(template=output_excel.template)
     fulcrum_excel = ff.CableComAppManager(file_path=input_excel.path)
     fulcrum_excel.set_excel_manager(excel_manager)
-    fulcrum_excel.read_excel()
-    fulcrum_excel.format_to_template()
+    with instrumentation.stage('read'):
+        fulcrum_excel.read_excel(use_cache=use_cache)
+    row_count = len(fulcrum_excel.df)
+    instrumentation.count(instrumentation.POLES, row_count)
+    report(progress, READING_ROWS, row_count, row_count)
+    with instrumentation.stage('format'):
+        fulcrum_excel.format_to_template()
+    report(progress, PROCESSING_POLES, row_count, row_count)
 
     # Once formatted to template
-    excel_manager.read_data_frame(fulcrum_excel.df)
-    excel_manager.create_output(file_path=output_excel.path)
+    report(progress, WRITING_OUTPUT, 0, row_count)
+    with instrumentation.stage('create_output'):
+        excel_manager.read_data_frame(fulcrum_excel.df)
+        excel_manager.create_output(file_path=output_excel.path)
+    report(progress, WRITING_OUTPUT, row_count, row_count)
 
 
-def get_pole_list_with_violations(input_excel: ExcelFile, make_ready_is_included: bool) -> List[Pole]:
-    """Returns a list of pole objects with make ready and sequence numbers"""
+def get_pole_list_with_violations(input_excel: ExcelFile, make_ready_is_included: bool,
+                                  progress: Optional[ProgressCallback] = None, use_cache: bool = True) -> List[Pole]:
+    """Returns a list of pole objects with make ready and sequence numbers (use_cache=False always parses the input
+    again)"""
     # Read excel data and format for PoleManager
-    excel_manager = em.select_template(input_excel.template)
-    excel_manager.set_file_path(input_excel.path)
-    excel_manager.read_excel()
-    excel_manager.format()
-    excel_manager.parse_column('additional_measurements')
-    excel_manager.parse_column('make_ready')
+    excel_manager = _read_template_excel(input_excel, progress, use_cache)
+    row_count = len(excel_manager.df)
 
     # Extract poles and create make ready
+    step_count = 3 if make_ready_is_included else 2
     poles = PoleManager()
-    poles.extract_poles(excel_manager.df)
+    with instrumentation.stage('extract_poles'):
+        # Attachments are extracted here so their time isn't counted in set_to_proposed or get_all_violations
+        poles.extract_poles(excel_manager.df, progress=_pole_progress(progress, 0, step_count))
+        poles.extract_attachments()
     if make_ready_is_included:
-        poles.set_to_proposed()
-    poles.get_all_violations()
+        with instrumentation.stage('set_to_proposed'):
+            poles.set_to_proposed(progress=_pole_progress(progress, 1, step_count))
+    with instrumentation.stage('get_all_violations'):
+        if len(poles.pole_list) >= VECTORIZED_POLE_COUNT:
+            poles.get_all_violations_vectorized()
+            report(progress, PROCESSING_POLES, row_count * step_count, row_count * step_count)
+        else:
+            poles.get_all_violations(progress=_pole_progress(progress, step_count - 1, step_count))
+    _count_poles(poles.pole_list, make_ready_is_included, count_attachments=True)
 
     # Return pole list
     return poles.pole_list
+
+
+def get_pole_list_with_violations_incremental(input_excel: ExcelFile, make_ready_is_included: bool,
+                                              progress: Optional[ProgressCallback] = None,
+                                              use_cache: bool = True) -> Tuple[List[Pole], inc.IncrementalReport]:
+    """Same as get_pole_list_with_violations but reuses the violations of poles that haven't changed since the last
+    run of the same workbook"""
+    excel_manager = _read_template_excel(input_excel, progress, use_cache)
+    poles = PoleManager()
+    with instrumentation.stage('extract_poles'):
+        poles.extract_poles(excel_manager.df, progress=_pole_progress(progress, 0, 2))
+    # Only changed poles need their attachments so they are extracted (And timed) in get_all_violations
+    with instrumentation.stage('get_all_violations'):
+        incremental_report = poles.get_all_violations_incremental(
+            inc.ResultStore(input_excel.path), make_ready_is_included, progress=_pole_progress(progress, 1, 2)
+        )
+    # Attachments of reused poles are never extracted so they aren't counted
+    _count_poles(poles.pole_list, make_ready_is_included, count_attachments=False)
+    logging.info(f"{input_excel.path}: {incremental_report}")
+    return poles.pole_list, incremental_report
+
+
+def iter_poles_with_violations(input_excel: ExcelFile, make_ready_is_included: bool,
+                               progress: Optional[ProgressCallback] = None) -> Iterator[Pole]:
+    """Same as get_pole_list_with_violations but reads and yields one pole at a time (For very large files)"""
+    excel_manager = em.select_template(input_excel.template)
+    rows = streaming.read_rows(input_excel.path, excel_manager)
+    rows = _count_progress(rows, progress, READING_ROWS)
+    rows = streaming.rename_headers(rows, excel_manager)
+    rows = streaming.parse_notes(rows)
+    poles = streaming.find_violations(rows, make_ready_is_included)
+    if instrumentation.is_enabled():
+        poles = _count_streamed_poles(poles)
+    return _count_progress(poles, progress, PROCESSING_POLES)
+
+
+def create_make_ready_output(input_excel: ExcelFile, output_excel: ExcelFile, make_ready_is_included: bool,
+                             progress: Optional[ProgressCallback] = None) -> None:
+    """Adds make ready violations to the make ready notes of a template spreadsheet one row at a time"""
+    excel_manager = em.select_template(input_excel.template)
+    poles = iter_poles_with_violations(input_excel, make_ready_is_included, progress)
+    output_rows = streaming.create_output_rows(poles, excel_manager)
+    output_rows = _count_progress(output_rows, progress, WRITING_OUTPUT)
+    streaming.write_output(output_rows, excel_manager, output_excel.path)
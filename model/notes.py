@@ -0,0 +1,112 @@
+"""
+Parses field notes ('name: value' lines and plain comments) for a whole column at once
+
+A parsed note is a tuple holding a NotePair for each 'name: value' line and a string for each comment:
+'catv: 2106\nDress Drip Loop' -> (NotePair(name='catv', value='2106'), 'Dress Drip Loop')
+
+Example of use:
+df['make_ready'] = parse_notes(df['make_ready'])
+df['make_ready'] = reverse_parse_notes(df['make_ready'])
+"""
+from typing import List, NamedTuple, Tuple, Union
+import numpy as np
+import pandas as pd
+
+
+class NotePair(NamedTuple):
+    """One 'name: value' line of a note"""
+    name: str
+    value: str
+
+
+ParsedNote = Tuple[Union[NotePair, str], ...]
+
+
+# ----- Static Methods ----- #
+def parse_note(note: str) -> ParsedNote:
+    """Splits a single note up into attachment pairs ('name: value' lines) and plain comments"""
+    parsed_note = []
+    for piece in note.split('\n'):
+        part = piece.split(': ')
+        if part[0] == 'nan':
+            continue
+        parsed_note.append(NotePair(part[0], part[1]) if len(part) > 1 else piece)
+    return tuple(parsed_note)
+
+
+def reverse_parse_note(parsed_note: ParsedNote) -> str:
+    """Combines attachment pairs and comments back into a single note"""
+    if len(parsed_note) == 0:
+        return 'nan'
+    return '\n'.join(_to_line(item) for item in parsed_note).strip()
+
+
+def parse_notes(notes: pd.Series) -> pd.Series:
+    """Same as parse_note for every note in a column (The column is split with string methods in one pass)"""
+    notes = notes.astype(str)
+    lines = notes.str.split('\n', regex=False).explode()
+    parts = lines.str.split(': ', n=2, regex=False, expand=True)
+    names = parts[0].to_numpy()
+    values = parts[1].to_numpy() if 1 in parts else np.full(len(parts), None)
+
+    # Lines starting with 'nan' are dropped
+    is_kept = names != 'nan'
+    items = [
+        NotePair(name, value) if value is not None else line
+        for name, value, line in zip(names[is_kept], values[is_kept], lines.to_numpy()[is_kept])
+    ]
+    line_counts = notes.str.count('\n').to_numpy() + 1
+    row_positions = np.repeat(np.arange(len(notes)), line_counts)[is_kept]
+    return pd.Series(_group(items, row_positions, len(notes)), index=notes.index, dtype=object)
+
+
+def reverse_parse_notes(parsed_notes: pd.Series) -> pd.Series:
+    """Same as reverse_parse_note for every parsed note in a column (Cells that aren't parsed notes are kept)"""
+    is_parsed = parsed_notes.map(lambda note: isinstance(note, (tuple, list))).to_numpy(dtype=bool)
+    if not is_parsed.any():
+        return parsed_notes
+    parsed = parsed_notes[is_parsed]
+    lengths = parsed.map(len).to_numpy()
+    lines = parsed.explode().dropna()
+    lines = pd.Series([_to_line(item) for item in lines], index=lines.index, dtype=object)
+
+    # Join the lines of each note back together ('nan' for notes without any lines)
+    row_positions = np.repeat(np.arange(len(parsed)), lengths)
+    joined = pd.Series(['\n'.join(group) for group in _group(lines.tolist(), row_positions, len(parsed))],
+                       index=parsed.index, dtype=object).str.strip()
+    joined[lengths == 0] = 'nan'
+
+    reversed_notes = parsed_notes.astype(object).copy()
+    reversed_notes[is_parsed] = joined
+    return reversed_notes
+
+
+def _to_line(item) -> str:
+    if isinstance(item, NotePair):
+        return f"{item.name}: {item.value}"
+    return item if isinstance(item, str) else ''
+
+
+def _group(items: List, row_positions: np.ndarray, row_count: int) -> List[tuple]:
+    """Splits a flat list of items back into a tuple for each row (row_positions is sorted)"""
+    boundaries = np.searchsorted(row_positions, np.arange(row_count + 1))
+    return [tuple(items[start:end]) for start, end in zip(boundaries[:-1], boundaries[1:])]
+
+
+# Test
+if __name__ == '__main__':
+    # Column parsing matches parsing one note at a time and turns back into the same text
+    test_notes = pd.Series([
+        'nan',
+        'catv: 2106',
+        'Move CATV to: 21\' 06"\nDress Drip Loop',
+        'fiber: 2400\nnan\ntelco: 2300: extra',
+        'Ground Streetlight\n  Mold Streetlight  ',
+        '',
+    ])
+    parsed_column = parse_notes(test_notes)
+    assert parsed_column.tolist() == [parse_note(note) for note in test_notes], parsed_column.tolist()
+    reversed_column = reverse_parse_notes(parsed_column)
+    assert reversed_column.tolist() == [reverse_parse_note(parse_note(note)) for note in test_notes]
+    print(parsed_column.tolist())
+    print(reversed_column.tolist())
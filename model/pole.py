@@ -1,11 +1,39 @@
-import logging
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 import model.constants as constants
 import model.attachment as at
+import model.diagnostics as diagnostics
+import model.instrumentation as instrumentation
+from model.notes import NotePair
 import pandas as pd
 
 
+# ----- Static Methods ----- #
+def find_violations(attachment_list: List[at.Attachment]) -> str:
+    """Finds all the violations between attachments on a pole (Sorts the list from highest to lowest)"""
+    # Store violations in a list
+    violations = []
+    # Sort by highest to the lowest attachment heights
+    attachment_list.sort(reverse=True)
+    heights = [attachment.get_height_in_inches() for attachment in attachment_list]
+    # Compare to only attachments lower on the pole
+    for i, attachment1 in enumerate(attachment_list):
+        violation_range = attachment1.get_violation_range()
+        for j in range(i + 1, len(attachment_list)):
+            # Every violation range is a max distance so anything further down can't be a violation
+            if heights[i] - heights[j] >= violation_range:
+                break
+            violation = attachment1.check_for_violation(attachment_list[j])
+            if violation is not None:
+                violations.append(violation)
+    return "\n".join(violations).rstrip()
+
+
+def find_payload_violations(payload: tuple) -> str:
+    """Finds all the violations of a pole from its violation payload (Used by worker processes)"""
+    return find_violations([at.from_payload(attachment) for attachment in payload])
+
+
 @dataclass
 class Pole:
     row: pd.DataFrame
@@ -14,7 +42,18 @@ class Pole:
         self.factory = at.AttachmentFactory()
         self.make_ready = None
         self.sequence_number = self.row['_title']
-        self.attachment_list = self.extract_attachments()
+        self._attachment_list = None
+
+    @property
+    def attachment_list(self) -> List[at.Attachment]:
+        """Attachments are only extracted the first time they are needed (Not at all if violations are reused)"""
+        if self._attachment_list is None:
+            self._attachment_list = self.extract_attachments()
+        return self._attachment_list
+
+    @attachment_list.setter
+    def attachment_list(self, attachment_list: List[at.Attachment]) -> None:
+        self._attachment_list = attachment_list
 
     def __repr__(self):
         return f"Sequence Number: {self.sequence_number}\nMake Ready Violations: {self.make_ready}"
@@ -35,8 +74,8 @@ class Pole:
 
             # Handle each comment
             for comment in self.row['make_ready']:
-                # Ex: comment = {'name': 'Move CATV to', 'value': '21' 06"'}
-                if isinstance(comment, dict):
+                # Ex: comment = NotePair(name='Move CATV to', value='21' 06"')
+                if isinstance(comment, NotePair):
                     self.update_attachment_height(comment)
                 elif comment == 'Dress Drip Loop':
                     self.dress_drip_loop(comment)
@@ -45,13 +84,15 @@ class Pole:
                 elif comment == 'Mold Streetlight':
                     self.mold_streetlight(comment)
                 else:
-                    logging.warning(f"Pole {self.sequence_number}: \"{comment}\" comment was not recognized")
+                    instrumentation.count(instrumentation.UNRECOGNIZED_COMMENTS)
+                    diagnostics.warn(self.sequence_number, diagnostics.UNRECOGNIZED_COMMENT,
+                                     f"\"{comment}\" comment was not recognized")
 
         def update_attachment_height(self, comment):
             """Handles comments that move an attachment to a new height"""
             # Get proposed name and height
-            proposed_attachment_name = self.factory.identify_comment_attachment(comment['name'], self.sequence_number)
-            proposed_attachment_height = comment['value']
+            proposed_attachment_name = self.factory.identify_comment_attachment(comment.name, self.sequence_number)
+            proposed_attachment_height = comment.value
             is_attachment_existing = False
             # Finds attachment
             for existing_attachment in self.attachment_list:
@@ -61,7 +102,8 @@ class Pole:
                     is_attachment_existing = True
             # If attachment cant be found log a warning
             if not is_attachment_existing:
-                logging.warning(f"Pole {self.sequence_number}: \"{comment['name']}\" attachment not on pole")
+                diagnostics.warn(self.sequence_number, diagnostics.MISSING_ATTACHMENT,
+                                 f"\"{comment.name}\" attachment not on pole")
 
         def dress_drip_loop(self, comment):
             """Updates drip loop height"""
@@ -75,9 +117,10 @@ class Pole:
                     if attachment.name == 'secondary_spool' or attachment.name == 'secondary_riser':
                         # Set drip loop INCHES_OF_DRIP below power
                         inches_of_drip = constants.INCHES_OF_DRIP
-                        drip_loop_obj.height = at.feet_and_inches(attachment.get_height_in_inches() - inches_of_drip)
+                        drip_loop_obj.inches = attachment.get_height_in_inches() - inches_of_drip
             else:
-                logging.warning(f"{self.sequence_number}: \"{comment}\" no drip loop found")
+                diagnostics.warn(self.sequence_number, diagnostics.MISSING_ATTACHMENT,
+                                 f"\"{comment}\" no drip loop found")
 
         def ground_streetlight(self, comment):
             """Updates streetlight to be grounded"""
@@ -85,7 +128,8 @@ class Pole:
             if streetlight_obj is not None:
                 streetlight_obj.grounded = True
             else:
-                logging.warning(f"{self.sequence_number}: \"{comment}\" no streetlight found")
+                diagnostics.warn(self.sequence_number, diagnostics.MISSING_ATTACHMENT,
+                                 f"\"{comment}\" no streetlight found")
 
         def mold_streetlight(self, comment):
             """Updates streetlight to be grounded molded"""
@@ -93,7 +137,8 @@ class Pole:
             if streetlight_obj is not None:
                 streetlight_obj.molded = True
             else:
-                logging.warning(f"{self.sequence_number}: \"{comment}\" no streetlight found")
+                diagnostics.warn(self.sequence_number, diagnostics.MISSING_ATTACHMENT,
+                                 f"\"{comment}\" no streetlight found")
 
     def extract_attachments(self) -> List[at.Attachment]:
         """Combines attachments from columns and notes"""
@@ -126,9 +171,9 @@ class Pole:
             """Loops through each attachment in notes and creates attachment list"""
             lst = []
             for attachment in self.row['additional_measurements']:
-                if isinstance(attachment, dict):
-                    name = attachment['name'].lower()
-                    height = attachment['value']
+                if isinstance(attachment, NotePair):
+                    name = attachment.name.lower()
+                    height = attachment.value
                     attachment_obj = self.factory.create_attachment(name, height, self.row)
                     if self.is_valid_attachment(attachment_obj):
                         lst.append(attachment_obj)
@@ -140,16 +185,18 @@ class Pole:
 
     def find_violations(self) -> str:
         """Finds all the violations"""
-        # Store violations in a string
-        violations = ""
-        # Sort by highest to the lowest attachment heights
-        self.attachment_list.sort(reverse=True)
-        # Compare to only attachments lower on the pole
-        for i, attachment1 in enumerate(self.attachment_list):
-            for attachment2 in self.attachment_list[i + 1:]:
-                if attachment1.check_for_violation(attachment2) is not None:
-                    violations += attachment1.check_for_violation(attachment2) + "\n"
-        return violations.rstrip()
+        return find_violations(self.attachment_list)
+
+    def get_violation_payload(self) -> tuple:
+        """Only the attachments as small tuples (Much smaller to send to another process than the whole row)"""
+        return tuple(attachment.to_payload() for attachment in self.attachment_list)
+
+    def get_tag_number(self) -> Optional[str]:
+        """PSE tag number of the pole (None if the row doesn't have one)"""
+        tag_number = self.row.get('pse_tag_number')
+        if tag_number is None or pd.isna(tag_number) or str(tag_number) in ('', 'nan'):
+            return None
+        return str(tag_number)
 
     def get_attachment(self, attachment_name: str) -> at.Attachment:
         """Finds the attachment instance using its name"""
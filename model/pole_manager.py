@@ -1,5 +1,25 @@
+import bisect
+import re
+from concurrent.futures import ProcessPoolExecutor
 from model.pole import Pole
-from typing import List
+import model.pole as pl
+import model.identifier_registry as ir
+import model.violation_engine as ve
+import model.incremental as inc
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+# Jobs with at least this many poles find violations with the vectorized engine
+VECTORIZED_POLE_COUNT = 500
+
+# Parallel violations settings
+PARALLEL_POLE_COUNT = 2000  # Fewer poles than this are checked in this process (Starting workers costs more)
+PARALLEL_CHUNK_SIZE = 250  # Poles sent to a worker at a time
+
+
+# ----- Static Methods ----- #
+def sequence_sort_key(sequence_number: str) -> tuple:
+    """Sorts '2-1' before '10-1' (Numbers are compared as numbers)"""
+    return tuple(int(part) if part.isdigit() else part for part in re.split(r'(\d+)', str(sequence_number)))
 
 
 class PoleManager:
@@ -14,8 +34,39 @@ class PoleManager:
 
     # Add violations to excel and format template
     fulcrum_excel.update_make_ready(poles.pole_list)
+
+    # Look up poles (Indexed by sequence number and PSE tag number the first time a pole is looked up)
+    poles.get_pole('12-1')
+    poles.get_pole_by_tag_number('452677-156958')
+    poles.get_poles_in_range('2-1', '10-1')
+    poles.pole_list.sort(key=lambda pole: pole.make_ready or '')
+    poles.invalidate_index()  # Editing the list in place (Other than appending) needs the index rebuilt
     """
-    pole_list: List[Pole] = []
+
+    def __init__(self):
+        # Each manager has its own list (A class level list would be shared by every manager in the process)
+        self._pole_list: List[Pole] = []
+        self._index_is_stale = True
+        self._indexed_count = 0
+        self._poles_by_sequence_number: Dict[str, Pole] = {}
+        self._poles_by_tag_number: Dict[str, Pole] = {}
+        self._sequence_keys: List[tuple] = []
+        self._poles_in_sequence_order: List[Pole] = []
+
+    @property
+    def pole_list(self) -> List[Pole]:
+        return self._pole_list
+
+    @pole_list.setter
+    def pole_list(self, pole_list: List[Pole]) -> None:
+        # Replacing the list drops the index (It is rebuilt on the next lookup)
+        self._pole_list = pole_list
+        self.invalidate_index()
+
+    def invalidate_index(self) -> None:
+        """Rebuilds the lookups on the next lookup (Needed after poles in the list are replaced, removed, reordered or
+        get a new sequence or tag number)"""
+        self._index_is_stale = True
 
     def __repr__(self) -> str:
         poles_str = ""
@@ -23,27 +74,138 @@ class PoleManager:
             poles_str += str(pole) + "\n"
         return poles_str
 
-    def extract_poles(self, dataframe) -> None:
+    def extract_poles(self, dataframe, progress: Callable[[int, int], None] = None) -> None:
         """Gets all the poles from the dataframe and stores it in a list"""
+        # Pick up any edits to the identifier files since the last run
+        ir.get_registry().reload_if_changed()
         # Make sure pole list is empty
         self.pole_list = []
         # Add poles
         for index, row in dataframe.iterrows():
             pole = Pole(row)
             self.pole_list.append(pole)
+            if progress is not None:
+                progress(len(self.pole_list), len(dataframe))
 
-    def set_to_proposed(self):
+    def extract_attachments(self) -> None:
+        """Extracts the attachments of every pole now instead of the first time they are needed"""
+        for pole in self.pole_list:
+            pole.attachment_list
+
+    def set_to_proposed(self, progress: Callable[[int, int], None] = None):
         for index, pole in enumerate(self.pole_list):
             pole.set_to_proposed_heights()
+            if progress is not None:
+                progress(index + 1, len(self.pole_list))
 
-    def get_all_violations(self) -> None:
+    def get_all_violations(self, progress: Callable[[int, int], None] = None) -> None:
         """Adds all violations for all poles to dict"""
-        for pole in self.pole_list:
+        for index, pole in enumerate(self.pole_list):
             pole.make_ready = pole.find_violations()
+            if progress is not None:
+                progress(index + 1, len(self.pole_list))
+
+    def get_all_violations_parallel(self, workers: Optional[int] = None, chunk_size: int = PARALLEL_CHUNK_SIZE,
+                                    serial_pole_count: int = PARALLEL_POLE_COUNT) -> None:
+        """Same as get_all_violations but splits the poles across worker processes"""
+        if len(self.pole_list) < serial_pole_count or workers == 1:
+            self.get_all_violations()
+            return
+        # Only the attachments are sent to the workers (Not the whole row)
+        payloads = [pole.get_violation_payload() for pole in self.pole_list]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map keeps the original order
+            make_ready_list = executor.map(pl.find_payload_violations, payloads, chunksize=chunk_size)
+            for pole, make_ready in zip(self.pole_list, make_ready_list):
+                pole.make_ready = make_ready
+
+    def get_all_violations_vectorized(self) -> None:
+        """Same as get_all_violations but compares the attachments of all poles at once (Faster for large jobs)"""
+        for pole, make_ready in zip(self.pole_list, ve.find_all_violations(self.pole_list)):
+            pole.make_ready = make_ready
+
+    def get_all_violations_incremental(self, store: inc.ResultStore, make_ready_is_included: bool,
+                                       progress: Callable[[int, int], None] = None) -> inc.IncrementalReport:
+        """Only finds violations for poles that are new or changed since the results in the store were saved"""
+        # Poles with a stored fingerprint reuse their make ready
+        context = inc.get_context(make_ready_is_included)
+        fingerprints = [inc.fingerprint_row(pole.row, context) for pole in self.pole_list]
+        changed_poles = []
+        for pole, fingerprint in zip(self.pole_list, fingerprints):
+            make_ready = store.results.get(fingerprint)
+            if make_ready is None:
+                changed_poles.append(pole)
+            else:
+                pole.make_ready = make_ready
+
+        # Find violations for the rest
+        if make_ready_is_included:
+            for pole in changed_poles:
+                pole.set_to_proposed_heights()
+        if len(changed_poles) >= VECTORIZED_POLE_COUNT:
+            for pole, make_ready in zip(changed_poles, ve.find_all_violations(changed_poles)):
+                pole.make_ready = make_ready
+        else:
+            for index, pole in enumerate(changed_poles):
+                pole.make_ready = pole.find_violations()
+                if progress is not None:
+                    progress(index + 1, len(changed_poles))
+
+        # Only keep results for the poles in this run
+        store.results = {fingerprint: pole.make_ready for pole, fingerprint in zip(self.pole_list, fingerprints)}
+        store.save()
+        return inc.IncrementalReport(pole_count=len(self.pole_list), recomputed_count=len(changed_poles))
 
     def get_pole(self, sequence_number: str) -> Pole:
-        """Finds a pole instance using its sequence number"""
-        for pole in self.pole_list:
-            if pole.sequence_number == sequence_number:
-                return pole
-        return "No poles have this sequence number"
+        """Finds a pole instance using its sequence number (The first one if the sequence number is used twice)"""
+        try:
+            return self._get_index()[0][sequence_number]
+        except KeyError:
+            raise ValueError(f"No poles have the sequence number {sequence_number}") from None
+
+    def get_pole_by_tag_number(self, tag_number: str) -> Pole:
+        """Finds a pole instance using its PSE tag number"""
+        try:
+            return self._get_index()[1][tag_number]
+        except KeyError:
+            raise ValueError(f"No poles have the PSE tag number {tag_number}") from None
+
+    def get_poles(self, sequence_numbers: Iterable[str]) -> List[Pole]:
+        """Finds the pole instance of each sequence number (Raises ValueError listing any that are missing)"""
+        poles_by_sequence_number = self._get_index()[0]
+        sequence_numbers = list(sequence_numbers)
+        missing = [number for number in sequence_numbers if number not in poles_by_sequence_number]
+        if missing:
+            raise ValueError(f"No poles have the sequence numbers {', '.join(map(str, missing))}")
+        return [poles_by_sequence_number[number] for number in sequence_numbers]
+
+    def get_poles_in_range(self, first: str, last: str) -> List[Pole]:
+        """Poles from the first to the last sequence number (Both included) in sequence order"""
+        _, _, sequence_keys, poles_in_sequence_order = self._get_index()
+        start = bisect.bisect_left(sequence_keys, sequence_sort_key(first))
+        end = bisect.bisect_right(sequence_keys, sequence_sort_key(last))
+        return poles_in_sequence_order[start:end]
+
+    def iter_in_sequence_order(self) -> Iterator[Pole]:
+        """Goes through the poles sorted by sequence number ('2-1' comes before '10-1')"""
+        return iter(self._get_index()[3])
+
+    def _get_index(self):
+        """Builds the lookups the first time they are needed after the pole list changes"""
+        # Poles appended to the list are picked up by its length (Any other change needs invalidate_index)
+        if self._index_is_stale or self._indexed_count != len(self._pole_list):
+            self._poles_by_sequence_number = {}
+            self._poles_by_tag_number = {}
+            for pole in self._pole_list:
+                self._poles_by_sequence_number.setdefault(pole.sequence_number, pole)
+                tag_number = pole.get_tag_number()
+                if tag_number is not None:
+                    self._poles_by_tag_number.setdefault(tag_number, pole)
+            # sorted is stable so poles with the same sequence number keep their order
+            self._poles_in_sequence_order = sorted(self._pole_list,
+                                                   key=lambda pole: sequence_sort_key(pole.sequence_number))
+            self._sequence_keys = [sequence_sort_key(pole.sequence_number) for pole in self._poles_in_sequence_order]
+            self._index_is_stale = False
+            self._indexed_count = len(self._pole_list)
+        return (self._poles_by_sequence_number, self._poles_by_tag_number, self._sequence_keys,
+                self._poles_in_sequence_order)
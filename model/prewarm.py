@@ -0,0 +1,50 @@
+"""
+Loads the model in the background while the window opens so the first Format or Make Ready doesn't wait on it
+
+Example of use:
+prewarm.start()  # Returns right away
+View()
+"""
+import logging
+import threading
+import time
+
+_thread = None
+_lock = threading.Lock()
+
+
+def prewarm() -> None:
+    """Imports pandas, openpyxl and the model and loads the templates and identifier files"""
+    start = time.perf_counter()
+    import model.model  # noqa: F401 (pandas, openpyxl and numpy come with it)
+    import model.format_fulcrum  # noqa: F401
+    import model.identifier_registry as ir
+    import model.template_registry as tr
+
+    # Identifier files and comment rules are compiled the first time they are used
+    identifier_registry = ir.get_registry()
+    identifier_registry.identify('neutral_height')
+    identifier_registry.comment_resolver.resolve('move catv to')
+    registry = tr.get_registry()
+    for name in registry.get_names():
+        registry.get_header_mapping(name)
+        registry.get_template_layout(registry.get_definition(name).template_path)
+    logging.debug(f"Model prewarmed in {time.perf_counter() - start:.2f}s")
+
+
+def start() -> threading.Thread:
+    """Prewarms on a daemon thread (Only once per process)"""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_prewarm_safely, name='prewarm', daemon=True)
+            _thread.start()
+        return _thread
+
+
+def _prewarm_safely() -> None:
+    # Anything that goes wrong here happens again (And is shown) when the job itself runs
+    try:
+        prewarm()
+    except Exception:
+        logging.exception('Prewarming the model failed')
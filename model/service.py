@@ -0,0 +1,391 @@
+"""
+Local HTTP service that runs Format and Make Ready jobs in a process that stays warm
+
+The model, identifier files, comment rules and templates are loaded once when the service starts so jobs don't pay
+for starting Python and importing pandas and openpyxl. Jobs wait in a queue and only a few run at once.
+
+Start it from the project folder:
+python cli.py serve --port 8765 --workers 2 --job-directory C:/jobs
+
+Requests must be sent as application/json to the address the service is bound to (So a web page can't post a form
+to it) and input and output paths are relative to the job directory (Paths outside of it are turned away). Bound to
+every interface (0.0.0.0) the service only knows which names it is reached by if they are given:
+python cli.py serve --host 0.0.0.0 --allowed-host poles.example.com --allowed-host 10.0.0.5
+
+Endpoints:
+GET  /health          Templates, running and queued jobs
+POST /jobs            Starts a job and waits for it (Add "wait": false to get the job id right away)
+GET  /jobs/<job id>   Status and result of a job
+
+Example of a job request:
+{"command": "make-ready", "input": "pole_data.xlsx", "template": "PSE", "include_make_ready": true}
+{"command": "format", "input": "cablecom_poles.xlsx", "output": "output/output.xlsx", "template": "PSE"}
+"""
+import json
+import logging
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Optional
+from view.excel_spreadsheet import ExcelFile
+
+DEFAULT_HOST = '127.0.0.1'  # Only reachable from this computer
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 2  # Jobs that run at the same time
+DEFAULT_MAX_QUEUED = 16  # Jobs that can wait for a worker before new ones are turned away
+DEFAULT_JOB_DIRECTORY = 'jobs'  # Input and output paths of requests have to be in this folder
+LOOPBACK_HOSTS = ('127.0.0.1', 'localhost')
+WILDCARD_HOSTS = ('0.0.0.0', '::', '')  # Every interface (Clients reach them by names the service can't know)
+FINISHED_JOBS_KEPT = 200  # Results of the most recent jobs kept for GET /jobs/<job id>
+
+# Commands
+FORMAT = 'format'
+MAKE_READY = 'make-ready'
+FORMAT_INPUT_TEMPLATE = 'Cable Comm App'
+
+# Job statuses
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class ServiceBusy(Exception):
+    """Raised when every worker is busy and the queue is full"""
+
+
+@dataclass
+class JobRequest:
+    """What a client asked for (Checked before it is queued)"""
+    command: str
+    input: str
+    template: str = 'PSE'
+    output: Optional[str] = None
+    include_make_ready: bool = False
+
+    @classmethod
+    def from_dict(cls, data: dict, job_directory: str = DEFAULT_JOB_DIRECTORY) -> 'JobRequest':
+        """Raises ValueError if the request can't be run (Paths are resolved inside the job directory)"""
+        import model.template_registry as tr
+        if not isinstance(data, dict):
+            raise ValueError('The job request must be a JSON object')
+        command = _get_field(data, 'command', str)
+        input_path = _get_field(data, 'input', str)
+        template = _get_field(data, 'template', str, default='PSE')
+        output_path = _get_field(data, 'output', str, default=None)
+        include_make_ready = _get_field(data, 'include_make_ready', bool, default=False)
+        if command not in (FORMAT, MAKE_READY):
+            raise ValueError(f"Unknown command '{command}' (Commands: {FORMAT}, {MAKE_READY})")
+        if command == FORMAT and output_path is None:
+            raise ValueError('Format jobs need an output path')
+        template_names = tr.get_registry().get_names()
+        if template not in template_names:
+            raise ValueError(f"Unknown template '{template}' (Templates: {', '.join(template_names)})")
+
+        request = cls(
+            command=command,
+            input=resolve_job_path(input_path, job_directory),
+            template=template,
+            output=None if output_path is None else resolve_job_path(output_path, job_directory),
+            include_make_ready=include_make_ready,
+        )
+        if not os.path.isfile(request.input):
+            raise ValueError(f"Input file not found: {input_path}")
+        if request.output is not None and not request.output.lower().endswith('.xlsx'):
+            raise ValueError(f"Output must be an .xlsx file: {output_path}")
+        return request
+
+
+class Job:
+    """
+    A job request and how it went
+
+    self.id: Id the client looks the job up by
+    self.request: What the client asked for
+    self.status: queued, running, done or failed
+    self.result: What the job returned (Once it is done)
+    self.error: Why the job failed
+    self.done_event: Set once the job is done or failed
+    """
+
+    def __init__(self, request: JobRequest):
+        self.id = uuid.uuid4().hex
+        self.request = request
+        self.status = QUEUED
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.done_event = threading.Event()
+
+    def to_dict(self) -> dict:
+        job = {'id': self.id, 'status': self.status, 'request': self.request.__dict__}
+        if self.started_at is not None:
+            job['queued_seconds'] = round(self.started_at - self.submitted_at, 4)
+        if self.finished_at is not None:
+            job['seconds'] = round(self.finished_at - self.started_at, 4)
+        if self.result is not None:
+            job['result'] = self.result
+        if self.error is not None:
+            job['error'] = self.error
+        return job
+
+
+class AnalysisService:
+    """
+    Queues jobs and runs a few at a time on worker threads in a process that keeps the model loaded
+
+    self.workers: Jobs that run at the same time
+    self.max_queued: Jobs that can wait for a worker
+    self.job_directory: Folder every input and output path of a request has to be in
+
+    Example of use:
+    service = AnalysisService(workers=2, job_directory='model/user_input')
+    request = JobRequest.from_dict({'command': MAKE_READY, 'input': 'pole_data.xlsx'}, service.job_directory)
+    job = service.submit(request)
+    job.done_event.wait()
+    job.result  # {'pole_count': 9, 'violation_count': 26, 'poles': [...]}
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, max_queued: int = DEFAULT_MAX_QUEUED,
+                 job_directory: str = DEFAULT_JOB_DIRECTORY):
+        if workers < 1 or max_queued < 0:
+            raise ValueError('There has to be at least one worker and the queue can\'t be negative')
+        self.workers = workers
+        self.max_queued = max_queued
+        self.job_directory = os.path.realpath(job_directory)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._pending_count = 0
+
+    def warm_up(self) -> None:
+        """Loads the model, identifier files, comment rules and templates before the first job"""
+        import model.prewarm as prewarm
+        prewarm.prewarm()
+
+    def submit(self, request: JobRequest) -> Job:
+        """Queues the job (Raises ServiceBusy if the queue is full)"""
+        job = Job(request)
+        with self._lock:
+            if self._pending_count >= self.workers + self.max_queued:
+                raise ServiceBusy(f"{self._pending_count} jobs are already running or queued")
+            self._pending_count += 1
+            self._jobs[job.id] = job
+            self._forget_old_jobs()
+        self._executor.submit(self._run, job)
+        return job
+
+    def get_job(self, job_id: str) -> Job:
+        with self._lock:
+            try:
+                return self._jobs[job_id]
+            except KeyError:
+                raise ValueError(f"No job has the id {job_id}") from None
+
+    def get_status(self) -> dict:
+        import model.template_registry as tr
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            'status': 'ok',
+            'templates': tr.get_registry().get_names(),
+            'workers': self.workers,
+            'running': sum(1 for job in jobs if job.status == RUNNING),
+            'queued': sum(1 for job in jobs if job.status == QUEUED),
+        }
+
+    def shutdown(self) -> None:
+        """Finishes the jobs already queued"""
+        self._executor.shutdown(wait=True)
+
+    def _run(self, job: Job) -> None:
+        job.started_at = time.time()
+        job.status = RUNNING
+        try:
+            job.result = run_request(job.request)
+            job.status = DONE
+        except Exception as error:
+            logging.debug(traceback.format_exc())
+            job.error = f"{type(error).__name__}: {error}"
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._pending_count -= 1
+            job.done_event.set()
+
+    def _forget_old_jobs(self) -> None:
+        """Drops the oldest finished jobs once there are too many (Called with the lock held)"""
+        finished = [job for job in self._jobs.values() if job.done_event.is_set()]
+        for job in finished[:max(0, len(finished) - FINISHED_JOBS_KEPT)]:
+            del self._jobs[job.id]
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """Turns HTTP requests into service calls (The service and allowed hosts are set on the server)"""
+
+    def do_GET(self):
+        if not self._is_host_allowed():
+            return
+        if self.path == '/health':
+            self._send(200, self.server.service.get_status())
+        elif self.path.startswith('/jobs/'):
+            try:
+                self._send(200, self.server.service.get_job(self.path[len('/jobs/'):]).to_dict())
+            except ValueError as error:
+                self._send(404, {'error': str(error)})
+        else:
+            self._send(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if not self._is_host_allowed():
+            return
+        if self.path != '/jobs':
+            self._send(404, {'error': f"Unknown path {self.path}"})
+            return
+        # Browsers can only send JSON to another site after asking it first (Forms and text/plain don't ask)
+        if self.headers.get_content_type() != 'application/json':
+            self._send(415, {'error': 'Job requests must be sent as application/json'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            data = json.loads(self.rfile.read(length) or b'{}')
+            request = JobRequest.from_dict(data, self.server.service.job_directory)
+            wait = _get_field(data, 'wait', bool, default=True)
+            job = self.server.service.submit(request)
+        except (ValueError, json.JSONDecodeError) as error:
+            self._send(400, {'error': str(error)})
+            return
+        except ServiceBusy as error:
+            self._send(503, {'error': str(error)})
+            return
+
+        if wait:
+            job.done_event.wait()
+            self._send(200 if job.status == DONE else 500, job.to_dict())
+        else:
+            self._send(202, job.to_dict())
+
+    def _is_host_allowed(self) -> bool:
+        """Turns away requests for another host name (A web page that rebinds its domain to this address)"""
+        if self.headers.get('Host', '').lower() in self.server.allowed_hosts:
+            return True
+        self._send(403, {'error': 'Host not allowed'})
+        return False
+
+    def log_message(self, message_format, *args):
+        logging.info(f"{self.address_string()} {message_format % args}")
+
+    def _send(self, status: int, body: dict) -> None:
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+# ----- Static Methods ----- #
+def _get_field(data: dict, name: str, field_type: type, **kwargs):
+    """Value of a request field (Raises ValueError if it's missing without a default or isn't the JSON type)"""
+    if name not in data or data[name] is None:
+        if 'default' not in kwargs:
+            raise ValueError(f"'{name}' is required")
+        return kwargs['default']
+    value = data[name]
+    if not isinstance(value, field_type):
+        raise ValueError(f"'{name}' must be a {'boolean' if field_type is bool else 'string'}")
+    return value
+
+
+def resolve_job_path(path: str, job_directory: str) -> str:
+    """Absolute path of a request path (Raises ValueError if it ends up outside of the job directory)"""
+    job_directory = os.path.realpath(job_directory)
+    resolved = os.path.realpath(os.path.join(job_directory, path))
+    if os.path.commonpath([resolved, job_directory]) != job_directory:
+        raise ValueError(f"Path is outside of the job directory: {path}")
+    return resolved
+
+
+def get_allowed_hosts(host: str, port: int, allowed_hosts: Iterable[str] = ()) -> set:
+    """Host headers the service answers to (localhost and 127.0.0.1 both reach a loopback address and allowed_hosts
+    are other names it is reached by). Raises ValueError if it is bound to every interface without any allowed hosts"""
+    hosts = set(allowed_hosts)
+    if host in LOOPBACK_HOSTS:
+        hosts.update(LOOPBACK_HOSTS)
+    elif host not in WILDCARD_HOSTS:
+        hosts.add(host)
+    if not hosts:
+        raise ValueError(f"Give the names the service is reached by when it is bound to every interface ({host!r})")
+    return {f"{name}:{port}".lower() for name in hosts} | ({name.lower() for name in hosts} if port == 80 else set())
+
+
+def run_request(request: JobRequest) -> dict:
+    """Runs a job with the same model functions the GUI and command line use"""
+    import model.model as m
+
+    input_excel = ExcelFile()
+    input_excel.path = request.input
+    output_excel = ExcelFile()
+    if request.output:
+        output_excel.path = request.output
+        output_excel.template = request.template
+        if output_excel.directory:
+            os.makedirs(output_excel.directory, exist_ok=True)
+
+    if request.command == FORMAT:
+        input_excel.template = FORMAT_INPUT_TEMPLATE
+        m.format_to_template(input_excel, output_excel)
+        return {'output': request.output}
+
+    input_excel.template = request.template
+    if request.output:
+        m.create_make_ready_output(input_excel, output_excel, request.include_make_ready)
+        return {'output': request.output}
+    pole_list = m.get_pole_list_with_violations(input_excel, request.include_make_ready)
+    poles = [{'sequence_number': str(pole.sequence_number), 'make_ready': pole.make_ready or ''}
+             for pole in pole_list]
+    return {
+        'pole_count': len(poles),
+        'violation_count': sum(len(pole['make_ready'].splitlines()) for pole in poles),
+        'poles': poles,
+    }
+
+
+def create_server(service: AnalysisService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                  allowed_hosts: Iterable[str] = ()) -> ThreadingHTTPServer:
+    # Checked before the port is taken
+    get_allowed_hosts(host, port, allowed_hosts)
+    server = ThreadingHTTPServer((host, port), RequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.allowed_hosts = get_allowed_hosts(host, server.server_port, allowed_hosts)
+    return server
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: int = DEFAULT_WORKERS,
+          max_queued: int = DEFAULT_MAX_QUEUED, job_directory: str = DEFAULT_JOB_DIRECTORY,
+          allowed_hosts: Iterable[str] = ()) -> None:
+    """Warms up and serves until interrupted (Ctrl+C)"""
+    # Nothing is loaded if the service can't answer anyone
+    get_allowed_hosts(host, port, allowed_hosts)
+    service = AnalysisService(workers=workers, max_queued=max_queued, job_directory=job_directory)
+    start = time.perf_counter()
+    service.warm_up()
+    server = create_server(service, host, port, allowed_hosts)
+    print(f"Serving {service.job_directory} on http://{host}:{server.server_port} "
+          f"(Warmed up in {time.perf_counter() - start:.2f}s)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
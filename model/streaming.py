@@ -0,0 +1,213 @@
+"""
+Row at a time version of the make ready pipeline
+
+Each stage is a generator so only one row is in memory at a time no matter how many poles are in the file:
+read_rows -> rename_headers -> parse_notes -> find_violations -> create_output_rows -> write_output
+
+Example of use:
+excel_manager = em.select_template('PSE')
+rows = read_rows('user_input/pole_data.xlsx', excel_manager)
+rows = rename_headers(rows, excel_manager)
+rows = parse_notes(rows)
+poles = find_violations(rows, make_ready_is_included=True)
+output_rows = create_output_rows(poles, excel_manager)
+write_output(output_rows, excel_manager, 'output/output.xlsx')
+"""
+import itertools
+from copy import copy
+from typing import Dict, Iterable, Iterator, List, Tuple
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+import model.excel_manager as em
+import model.identifier_registry as ir
+import model.notes as notes
+import model.template_registry as tr
+from model.pole import Pole
+
+NOTE_COLUMNS = ('additional_measurements', 'make_ready')
+
+
+# ----- Static Methods ----- #
+def to_measurement(value):
+    """Converts a cell to a whole number height (None if it isn't a number), like _format_measurements does"""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return int(float(value))
+    except (ValueError, TypeError):
+        return None
+
+
+def to_text(value) -> str:
+    """Converts a cell to text the same way read_excel does ('nan' for an empty cell)"""
+    if value is None:
+        return 'nan'
+    return str(value)
+
+
+# ----- Pipeline stages ----- #
+def read_rows(file_path: str, excel_manager: em.ExcelManager) -> Iterator[Dict]:
+    """Reads the spreadsheet in read only mode and yields each filled in row as a dictionary of template headers"""
+    wb = openpyxl.load_workbook(filename=file_path, read_only=True)
+    try:
+        data = wb.active.values
+        # Skip the rows above the headers
+        for _ in range(excel_manager.header_row - 1):
+            next(data)
+        # Only keep columns that have a header
+        headers = [(index, header) for index, header in enumerate(next(data)) if header is not None]
+        measurement_headers = set(excel_manager.measurement_headers)
+        for values in data:
+            # Skip rows that are entirely empty
+            if all(value is None for value in values):
+                continue
+            yield {
+                header: (to_measurement if header in measurement_headers else to_text)(
+                    values[index] if index < len(values) else None
+                )
+                for index, header in headers
+            }
+    finally:
+        wb.close()
+
+
+def rename_headers(rows: Iterable[Dict], excel_manager: em.ExcelManager) -> Iterator[Dict]:
+    """Renames the headers of each row to standard headers (Or back to template headers)"""
+    names = {}
+    for row in rows:
+        for header in row:
+            if header not in names:
+                names[header] = excel_manager.rename_header(header)
+        yield {names[header]: value for header, value in row.items()}
+
+
+def parse_notes(rows: Iterable[Dict], columns=NOTE_COLUMNS) -> Iterator[Dict]:
+    """Splits the notes of each row up into tuples of attachment pairs and comments"""
+    for row in rows:
+        for column in columns:
+            row[column] = notes.parse_note(row[column])
+        yield row
+
+
+def find_violations(rows: Iterable[Dict], make_ready_is_included: bool) -> Iterator[Pole]:
+    """Creates a pole from each row and finds its make ready violations"""
+    # Pick up any edits to the identifier files and comment rules since the last run (Same as extract_poles)
+    ir.get_registry().reload_if_changed()
+    for row in rows:
+        pole = Pole(row)
+        if make_ready_is_included:
+            pole.set_to_proposed_heights()
+        pole.make_ready = pole.find_violations()
+        yield pole
+
+
+def create_output_rows(poles: Iterable[Pole], excel_manager: em.ExcelManager,
+                       columns=NOTE_COLUMNS) -> Iterator[Dict]:
+    """Adds the violations to the make ready notes and changes each row back to template headers"""
+    names = {}
+    for pole in poles:
+        row = pole.row
+        for column in columns:
+            row[column] = notes.reverse_parse_note(row[column])
+        # Same as update_make_ready
+        if row['make_ready'] == 'nan':
+            row['make_ready'] = pole.make_ready
+        elif pole.make_ready != "":
+            row['make_ready'] += "\n" + pole.make_ready
+        for header in row:
+            if header not in names:
+                names[header] = excel_manager.rename_header(header)
+        yield {names[header]: value for header, value in row.items()}
+
+
+def write_output(rows: Iterable[Dict], excel_manager: em.ExcelManager, file_path: str) -> None:
+    """Writes rows under the template headers with a write only workbook (Nothing is kept in memory)
+
+    Same layout as create_output: rows that land on the template's formatted rows keep that row's formatting, the
+    formatted rows left under the data are written after it and rows past the end of the template get the formatting
+    of the first row under the headers. Only the template's first sheet is written."""
+    # Copied out of the template once per process
+    layout = tr.get_registry().get_template_layout(excel_manager.template_path)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(layout.title)
+
+    # Column widths, row heights, merged cells and conditional formatting have to be set before any rows are written
+    for key, width in layout.column_widths.items():
+        ws.column_dimensions[key].width = width
+    for key, height in layout.row_heights.items():
+        ws.row_dimensions[key].height = height
+    for merged_range in layout.merged_ranges:
+        ws.merged_cells.add(merged_range)
+    for cell_range, rules in layout.conditional_formats:
+        for rule in rules:
+            ws.conditional_formatting.add(cell_range, copy(rule))
+    for validation in layout.data_validations:
+        ws.data_validations.append(copy(validation))
+
+    styles = {}
+    header_row = excel_manager.header_row
+    template_rows = layout.rows[:header_row]
+    formatted_rows = layout.rows[header_row:]
+    data_style_cells = formatted_rows[0] if formatted_rows else ()
+
+    rows = iter(rows)
+    first_row = next(rows, None)
+    headers = list(first_row) if first_row is not None else []
+
+    # Template rows above the data (Grounded and Molded headers go after the template headers)
+    for row_number, row in enumerate(template_rows, start=1):
+        values = [cell.value for cell in row]
+        if row_number == header_row:
+            for index in range(len(excel_manager.template_headers), min(len(headers), len(values))):
+                values[index] = headers[index]
+        ws.append(_template_row(ws, row, values, styles))
+
+    # Rows on the template's formatted rows take that row's formatting
+    rows = itertools.chain([first_row], rows) if first_row is not None else rows
+    formatted_row_count = 0
+    for template_row, row in zip(formatted_rows, rows):
+        ws.append(_template_row(ws, template_row, list(row.values()), styles))
+        formatted_row_count += 1
+
+    # Formatted rows left under the data
+    for template_row in formatted_rows[formatted_row_count:]:
+        ws.append(_template_row(ws, template_row, [cell.value for cell in template_row], styles))
+
+    # Rows are written as soon as they are appended so the same styled cells get reused for every row past the template
+    data_cells = [_styled_cell(ws, None, cell, styles) for cell in data_style_cells]
+    for row in rows:
+        ws.append(_data_row(row, data_cells))
+
+    wb.save(file_path)
+
+
+def _template_row(ws, template_row: Tuple[tr.TemplateCell, ...], values: List, styles: Dict) -> List:
+    """Puts the values into cells styled like the template row (Template cells past the values keep their value)"""
+    cells = [_styled_cell(ws, value, cell, styles) for value, cell in zip(values, template_row)]
+    cells += [_styled_cell(ws, cell.value, cell, styles) for cell in template_row[len(values):]]
+    return cells + values[len(template_row):]
+
+
+def _data_row(row: Dict, data_cells: List[WriteOnlyCell]) -> List:
+    """Puts the row values into the styled cells (Any extra columns are written without a style)"""
+    values = list(row.values())
+    for cell, value in zip(data_cells, values):
+        cell.value = value
+    return data_cells[:len(values)] + values[len(data_cells):]
+
+
+def _styled_cell(ws, value, template_cell: tr.TemplateCell, styles: Dict) -> WriteOnlyCell:
+    """Creates a write only cell with the same style as a template cell (styles holds the style of each template
+    style already added to the workbook)"""
+    cell = WriteOnlyCell(ws, value=value)
+    if template_cell.style is None:
+        return cell
+    # Adding a style to the workbook compares it with every style already there, so each one is only added once and
+    # its style ids are copied after that (Same as openpyxl does when it copies a worksheet)
+    key = id(template_cell.style)
+    if key not in styles:
+        for name, style in template_cell.style.items():
+            setattr(cell, name, style)
+        styles[key] = cell._style
+    cell._style = copy(styles[key])
+    return cell
@@ -0,0 +1,261 @@
+import importlib
+import io
+import json
+import os
+import threading
+from copy import copy
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Tuple
+
+# openpyxl and pandas are only imported once a workbook is loaded (Listing the templates stays fast)
+if TYPE_CHECKING:
+    import openpyxl
+    import pandas as pd
+
+TEMPLATE_DIRECTORY = 'model/templates'
+
+
+@dataclass(frozen=True)
+class TemplateDefinition:
+    """
+    Everything about a template that is declared in its json file (model/templates/<name>.json)
+
+    One definition is shared by every manager of the template in the process so the map and header lists are stored
+    read only (Managers copy them).
+
+    self.name: Name the template is selected by
+    self.manager: Import path of the ExcelManager class that handles the template
+    self.template_path: Excel template the output is written into
+    self.header_row: Row of the template the column headers are on (Data starts on the row after)
+    self.attachment_map: Template header to the standard header the PoleManager class understands
+    self.template_headers: Template headers in the order they are in the template
+    self.measurement_headers: Template headers of the attachment height columns (Stored as whole numbers)
+    self.extra_headers: Standard headers added after the template headers (Grounded and molded go in T9 and U9)
+    """
+    name: str
+    manager: str
+    template_path: str
+    header_row: int
+    attachment_map: Mapping[str, str]
+    template_headers: Tuple[str, ...]
+    measurement_headers: Tuple[str, ...] = ()
+    extra_headers: Tuple[str, ...] = ()
+
+    def __post_init__(self):
+        # Frozen only stops the fields being replaced, so the dictionary and lists from the json are made read only too
+        object.__setattr__(self, 'attachment_map', MappingProxyType(dict(self.attachment_map)))
+        for name in ('template_headers', 'measurement_headers', 'extra_headers'):
+            object.__setattr__(self, name, tuple(getattr(self, name)))
+
+    @classmethod
+    def from_file(cls, file_path: str) -> 'TemplateDefinition':
+        with open(file_path, 'r') as f:
+            return cls(**json.load(f))
+
+
+@dataclass(frozen=True)
+class TemplateCell:
+    """
+    Value and style of a template cell copied out of the workbook
+
+    self.value: What the cell holds
+    self.style: Font, fill, border, alignment, protection and number format copies (None if the cell has no style and
+    the same dictionary for every cell of a sheet with the same style)
+    """
+    value: Any
+    style: Optional[Dict[str, Any]]
+
+    @classmethod
+    def from_cell(cls, cell, styles: Optional[Dict[int, Dict[str, Any]]] = None) -> 'TemplateCell':
+        """styles holds the style already copied for each style id of the workbook"""
+        if not cell.has_style:
+            return cls(cell.value, None)
+        styles = {} if styles is None else styles
+        if cell.style_id not in styles:
+            style = {name: copy(getattr(cell, name)) for name in ('font', 'fill', 'border', 'alignment', 'protection')}
+            style['number_format'] = cell.number_format
+            styles[cell.style_id] = style
+        return cls(cell.value, styles[cell.style_id])
+
+
+@dataclass(frozen=True)
+class TemplateLayout:
+    """
+    Plain copy of the template sheet (Shared by every output so nothing writes to a workbook another thread is
+    reading)
+
+    self.title: Sheet name
+    self.column_widths: Column letter to width
+    self.row_heights: Row number to height
+    self.merged_ranges: Merged cells such as 'A1:C2'
+    self.conditional_formats: Cell range and its rules for each conditional format (Copy the rules before adding them
+    to a sheet, adding them sets their priority)
+    self.data_validations: Data validations of the sheet (Copy them before adding them to a sheet)
+    self.rows: Cells of every row of the sheet (Including the formatted rows under the headers)
+    """
+    title: str
+    column_widths: Dict[str, float]
+    row_heights: Dict[int, float]
+    merged_ranges: Tuple[str, ...]
+    conditional_formats: Tuple[Tuple[str, Tuple[Any, ...]], ...]
+    data_validations: Tuple[Any, ...]
+    rows: Tuple[Tuple[TemplateCell, ...], ...]
+
+    @classmethod
+    def from_sheet(cls, sheet) -> 'TemplateLayout':
+        styles = {}
+        return cls(
+            title=sheet.title,
+            column_widths={key: dimension.width for key, dimension in sheet.column_dimensions.items()},
+            row_heights={key: dimension.height for key, dimension in sheet.row_dimensions.items()},
+            merged_ranges=tuple(str(merged_range) for merged_range in sheet.merged_cells.ranges),
+            conditional_formats=tuple((str(formats.sqref), tuple(copy(rule) for rule in formats.rules))
+                                      for formats in sheet.conditional_formatting),
+            data_validations=tuple(copy(validation) for validation in sheet.data_validations.dataValidation),
+            rows=tuple(tuple(TemplateCell.from_cell(cell, styles) for cell in row) for row in sheet.iter_rows()),
+        )
+
+
+class HeaderMapping:
+    """
+    Every header rename of a template compiled into one dictionary so a whole DataFrame is renamed at once
+
+    self.rename: Template header to standard header and standard header to template header (The attachment map wins
+    when a header is in both, same as rename_header)
+
+    Example of use:
+    mapping = HeaderMapping(excel_manager.attachment_map, excel_manager.reversed_map)
+    mapping.get('Seq #')  # Returns '_title'
+    df = mapping.apply(df)
+    """
+
+    def __init__(self, attachment_map: Dict[str, str], reversed_map: Dict[str, str]):
+        self.rename = {**(reversed_map or {}), **(attachment_map or {})}
+
+    def get(self, header: str) -> str:
+        return self.rename.get(header, header)
+
+    def apply(self, df: 'pd.DataFrame') -> 'pd.DataFrame':
+        """Renames every column with a single set_axis (Returns the same DataFrame if nothing needs renaming)"""
+        columns = [self.get(column) for column in df.columns]
+        # Fast path for a DataFrame that is already in the target schema
+        if columns == list(df.columns):
+            return df
+        if len(set(columns)) == len(columns):
+            return df.set_axis(columns, axis=1)
+        # Columns renamed to the same header keep the first position and the last values (Same as assigning them one
+        # at a time)
+        last_position = {column: position for position, column in enumerate(columns)}
+        order = list(dict.fromkeys(columns))
+        return df.iloc[:, [last_position[column] for column in order]].set_axis(order, axis=1)
+
+
+class TemplateRegistry:
+    """
+    Finds the templates declared in the templates folder and only loads the ones that are used
+
+    Definitions, compiled header mappings and template workbooks are each loaded once per process. Template
+    workbooks are kept as file bytes (openpyxl workbooks can't be copied) so each output still gets its own workbook
+    without reading the disk again. Layouts are plain values so they can be shared.
+
+    self.template_directory: Folder holding a json definition (And usually the Excel template) for each template
+
+    Example of use:
+    registry = get_registry()
+    registry.get_names()  # ['PSE']
+    excel_manager = registry.create_manager('PSE')
+    wb = registry.load_template_workbook(excel_manager.template_path)
+    layout = registry.get_template_layout(excel_manager.template_path)
+    """
+
+    def __init__(self, template_directory: str = TEMPLATE_DIRECTORY):
+        self.template_directory = template_directory
+        self._lock = threading.RLock()
+        self._definition_paths: Optional[Dict[str, str]] = None
+        self._definitions: Dict[str, TemplateDefinition] = {}
+        self._header_mappings: Dict[str, HeaderMapping] = {}
+        self._template_bytes: Dict[str, bytes] = {}
+        self._template_layouts: Dict[str, TemplateLayout] = {}
+
+    def get_names(self) -> List[str]:
+        """Names of every declared template (Only the file names are read)"""
+        return list(self._get_definition_paths())
+
+    def get_definition(self, name: str) -> TemplateDefinition:
+        """Loads the template definition the first time it is used"""
+        with self._lock:
+            if name not in self._definitions:
+                definition_paths = self._get_definition_paths()
+                if name not in definition_paths:
+                    raise ValueError(f"Unknown template '{name}' (Templates: {', '.join(definition_paths)})")
+                self._definitions[name] = TemplateDefinition.from_file(definition_paths[name])
+            return self._definitions[name]
+
+    def get_header_mapping(self, name: str) -> HeaderMapping:
+        """Compiles the header mapping of a template the first time it is used"""
+        with self._lock:
+            if name not in self._header_mappings:
+                attachment_map = self.get_definition(name).attachment_map
+                reversed_map = {v: k for k, v in attachment_map.items()}
+                self._header_mappings[name] = HeaderMapping(attachment_map, reversed_map)
+            return self._header_mappings[name]
+
+    def create_manager(self, name: str):
+        """Creates the ExcelManager of a template (The manager's module is only imported when it is first used)"""
+        definition = self.get_definition(name)
+        module_name, class_name = definition.manager.rsplit('.', 1)
+        manager_class = getattr(importlib.import_module(module_name), class_name)
+        return manager_class(definition)
+
+    def load_template_workbook(self, template_path: str) -> 'openpyxl.Workbook':
+        """New workbook of the template that can be written to"""
+        import openpyxl
+        with self._lock:
+            if template_path not in self._template_bytes:
+                with open(template_path, 'rb') as f:
+                    self._template_bytes[template_path] = f.read()
+            template_bytes = self._template_bytes[template_path]
+        return openpyxl.load_workbook(io.BytesIO(template_bytes))
+
+    def get_template_layout(self, template_path: str) -> TemplateLayout:
+        """Values, styles and formatting of the template sheet (Copied out of the workbook once)"""
+        with self._lock:
+            if template_path not in self._template_layouts:
+                sheet = self.load_template_workbook(template_path).active
+                self._template_layouts[template_path] = TemplateLayout.from_sheet(sheet)
+            return self._template_layouts[template_path]
+
+    def invalidate(self) -> None:
+        """Drops everything that was loaded so templates get found and read again"""
+        with self._lock:
+            self._definition_paths = None
+            self._definitions = {}
+            self._header_mappings = {}
+            self._template_bytes = {}
+            self._template_layouts = {}
+
+    def _get_definition_paths(self) -> Dict[str, str]:
+        """Template name to definition file (Found the first time a template is needed)"""
+        with self._lock:
+            if self._definition_paths is None:
+                self._definition_paths = {
+                    os.path.splitext(file)[0]: os.path.join(self.template_directory, file)
+                    for file in sorted(os.listdir(self.template_directory)) if file.endswith('.json')
+                }
+            return self._definition_paths
+
+
+# ----- Process-wide registry ----- #
+_registry: Optional[TemplateRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> TemplateRegistry:
+    """Returns the registry shared by the whole process"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = TemplateRegistry()
+    return _registry
@@ -0,0 +1,144 @@
+from dataclasses import dataclass
+from typing import List
+import numpy as np
+import model.constants as constants
+import model.attachment as at
+
+# Attachment classes stored in the kind column
+POWER = 0
+COMM = 1
+STREETLIGHT = 2
+
+# Largest (poles x attachments x attachments) block compared at once
+MAX_BLOCK_SIZE = 4_000_000
+
+
+@dataclass
+class AttachmentTable:
+    """
+    Every attachment of every pole stored as columns instead of objects
+
+    Rows are sorted by pole, then highest to lowest attachment, keeping the original order of equal heights (The same
+    order Pole.find_violations sorts its attachment list in).
+
+    self.pole_id: Index of the pole in the pole list the attachment belongs to
+    self.height: Attachment height in inches
+    self.kind: POWER, COMM or STREETLIGHT
+    self.grounded: Streetlight is grounded (False for any other attachment)
+    self.molded: Streetlight is molded (False for any other attachment)
+    self.name_id: Index of the attachment name in self.names
+    self.names: Every distinct attachment name
+    self.same_group: Names where one starts with the other ('catv' and 'catv_2nd_attach') indexed by name_id
+    self.pole_count: Number of poles in the table (Including poles without attachments)
+    """
+    pole_id: np.ndarray
+    height: np.ndarray
+    kind: np.ndarray
+    grounded: np.ndarray
+    molded: np.ndarray
+    name_id: np.ndarray
+    names: List[str]
+    same_group: np.ndarray
+    pole_count: int
+
+    @classmethod
+    def from_poles(cls, pole_list) -> 'AttachmentTable':
+        """Flattens the attachment lists of the poles into columns"""
+        pole_id, height, kind, grounded, molded, name_id = [], [], [], [], [], []
+        name_ids = {}
+        for index, pole in enumerate(pole_list):
+            for attachment in pole.attachment_list:
+                pole_id.append(index)
+                height.append(attachment.get_height_in_inches())
+                if isinstance(attachment, at.Streetlight):
+                    kind.append(STREETLIGHT)
+                    grounded.append(bool(attachment.grounded))
+                    molded.append(bool(attachment.molded))
+                else:
+                    kind.append(COMM if isinstance(attachment, at.Comm) else POWER)
+                    grounded.append(False)
+                    molded.append(False)
+                name_id.append(name_ids.setdefault(attachment.name, len(name_ids)))
+
+        # Sort by pole then highest to lowest (Stable so equal heights keep their order)
+        pole_id = np.array(pole_id, dtype=np.int64)
+        height = np.array(height, dtype=np.int64)
+        order = np.lexsort((np.arange(len(height)), -height, pole_id))
+
+        names = list(name_ids)
+        same_group = np.array(
+            [[a.startswith(b) or b.startswith(a) for b in names] for a in names], dtype=bool
+        ).reshape(len(names), len(names))
+
+        return cls(
+            pole_id=pole_id[order],
+            height=height[order],
+            kind=np.array(kind, dtype=np.int8)[order],
+            grounded=np.array(grounded, dtype=bool)[order],
+            molded=np.array(molded, dtype=bool)[order],
+            name_id=np.array(name_id, dtype=np.int64)[order],
+            names=names,
+            same_group=same_group,
+            pole_count=len(pole_list),
+        )
+
+    def get_violation_range(self) -> np.ndarray:
+        """Distance comm attachments must be below each attachment"""
+        violation_range = np.full(len(self.kind), constants.INCHES_POWER_TO_COMM, dtype=np.int64)
+        violation_range[self.kind == COMM] = constants.INCHES_COMM_TO_COMM
+        is_streetlight = self.kind == STREETLIGHT
+        violation_range[is_streetlight] = constants.INCHES_STREETLIGHT_TO_COMM
+        violation_range[is_streetlight & self.grounded] = constants.INCHES_STREETLIGHT_GROUNDED_TO_COMM
+        violation_range[is_streetlight & self.grounded & self.molded] = \
+            constants.INCHES_STREETLIGHT_GROUNDED_AND_MOLDED_TO_COMM
+        return violation_range
+
+
+def find_all_violations(pole_list) -> List[str]:
+    """Returns the make ready violations of every pole (Same strings as Pole.find_violations)"""
+    table = AttachmentTable.from_poles(pole_list)
+    violations = [[] for _ in range(table.pole_count)]
+    if len(table.height) == 0:
+        return ["" for _ in violations]
+
+    violation_range = table.get_violation_range()
+    counts = np.bincount(table.pole_id, minlength=table.pole_count)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    # Poles with the same number of attachments are compared together as one (poles x n x n) block
+    for n in np.unique(counts):
+        if n < 2:
+            continue
+        poles = np.flatnonzero(counts == n)
+        block_length = max(1, MAX_BLOCK_SIZE // (n * n))
+        for block_start in range(0, len(poles), block_length):
+            block_poles = poles[block_start:block_start + block_length]
+            _add_block_violations(table, violation_range, block_poles, starts[block_poles], n, violations)
+
+    return ["\n".join(pole_violations).rstrip() for pole_violations in violations]
+
+
+def _add_block_violations(table: AttachmentTable, violation_range: np.ndarray, poles: np.ndarray,
+                          starts: np.ndarray, n: int, violations: List[List[str]]) -> None:
+    """Compares every attachment with every attachment below it for a block of poles with n attachments each"""
+    rows = starts[:, None] + np.arange(n)
+    height = table.height[rows]
+    kind = table.kind[rows]
+    name_id = table.name_id[rows]
+
+    # [pole, upper, lower]
+    distance = np.abs(height[:, :, None] - height[:, None, :])
+    is_below = np.triu(np.ones((n, n), dtype=bool), k=1)
+    lower_is_comm = (kind == COMM)[:, None, :]
+    is_in_range = distance < violation_range[rows][:, :, None]
+    is_comm_pair_of_same_attachment = (kind == COMM)[:, :, None] & table.same_group[name_id[:, :, None],
+                                                                                    name_id[:, None, :]]
+    is_violation = is_below & lower_is_comm & is_in_range & ~is_comm_pair_of_same_attachment
+
+    # nonzero is row major so violations come out in the same order as the nested loop
+    for pole, upper, lower in zip(*np.nonzero(is_violation)):
+        lower_name = table.names[name_id[pole, lower]]
+        upper_name = table.names[name_id[pole, upper]]
+        violations[poles[pole]].append(
+            f"VIOLATION-{lower_name} is {distance[pole, upper, lower]}\" from {upper_name}"
+        )
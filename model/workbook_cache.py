@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from typing import Optional
+import pandas as pd
+
+CACHE_DIRECTORY = 'model/cache'
+MAX_CACHE_BYTES = 500 * 1024 * 1024  # Least recently used workbooks are removed past this size
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+class WorkbookCache:
+    """
+    Keeps parsed spreadsheets on disk so reading the same workbook again skips pd.read_excel
+
+    Entries are keyed by the file path, size, modified time and a hash of the file contents, so any change to the
+    workbook is a miss. Each hit touches the entry and the least recently used entries are removed once the cache is
+    over max_bytes.
+
+    self.cache_directory: Folder the parsed DataFrames are pickled to
+    self.max_bytes: Largest total size of the cache folder
+    self.hits: Number of reads served from the cache
+    self.misses: Number of reads that had to parse the workbook
+
+    Example of use:
+    cache = get_cache()
+    df = cache.read_excel('user_input/pole_data.xlsx', skiprows=8)
+    df = cache.read_excel('user_input/pole_data.xlsx', skiprows=8)  # Loaded from the cache
+    cache.clear()
+    """
+
+    def __init__(self, cache_directory: str = CACHE_DIRECTORY, max_bytes: int = MAX_CACHE_BYTES):
+        self.cache_directory = cache_directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def read_excel(self, file_path: str, use_cache: bool = True, **read_options) -> pd.DataFrame:
+        """Same as pd.read_excel(file_path, **read_options) but reuses the last parse of an unchanged file"""
+        if not use_cache:
+            return pd.read_excel(file_path, **read_options)
+        entry_path = os.path.join(self.cache_directory, self.get_key(file_path, read_options) + '.pkl')
+        dataframe = self._load(entry_path)
+        if dataframe is not None:
+            self.hits += 1
+            return dataframe
+        self.misses += 1
+        dataframe = pd.read_excel(file_path, **read_options)
+        self._save(entry_path, dataframe)
+        return dataframe
+
+    @staticmethod
+    def get_key(file_path: str, read_options: Optional[dict] = None) -> str:
+        """Hash of the file path, size, modified time, contents and the options it is read with"""
+        stat = os.stat(file_path)
+        content_hash = hashlib.blake2b(digest_size=16)
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+                content_hash.update(chunk)
+        key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, content_hash.hexdigest(),
+               sorted((read_options or {}).items()))
+        return hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+    def clear(self) -> None:
+        """Removes every cached workbook"""
+        with self._lock:
+            for entry_path in self._list_entries():
+                self._remove(entry_path)
+
+    def size(self) -> int:
+        """Total bytes of every cached workbook"""
+        return sum(os.path.getsize(entry_path) for entry_path in self._list_entries())
+
+    def _load(self, entry_path: str) -> Optional[pd.DataFrame]:
+        """Returns the cached DataFrame or None if there isn't one (Unreadable entries are removed)"""
+        try:
+            with open(entry_path, 'rb') as f:
+                dataframe = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            self._remove(entry_path)
+            return None
+        # Mark as recently used
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return dataframe
+
+    def _save(self, entry_path: str, dataframe: pd.DataFrame) -> None:
+        """Writes the entry to a temp file first so other processes never read half an entry"""
+        with self._lock:
+            temp_path = None
+            try:
+                os.makedirs(self.cache_directory, exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=self.cache_directory, suffix='.tmp')
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(dataframe, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, entry_path)
+            except Exception:
+                # Caching is only a speed up so a full disk or a value that can't be pickled isn't an error
+                logging.debug(f"Could not cache {entry_path}", exc_info=True)
+                return
+            finally:
+                # Only still there if it was never moved into place
+                if temp_path is not None and os.path.exists(temp_path):
+                    self._remove(temp_path)
+            self._evict()
+
+    def _evict(self) -> None:
+        """Removes the least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for entry_path in self._list_entries():
+            try:
+                stat = os.stat(entry_path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(entry_path)
+            total -= size
+
+    def _list_entries(self):
+        try:
+            names = os.listdir(self.cache_directory)
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.cache_directory, name) for name in names if name.endswith('.pkl')]
+
+    @staticmethod
+    def _remove(entry_path: str) -> None:
+        try:
+            os.remove(entry_path)
+        except OSError:
+            pass
+
+
+# ----- Process-wide cache ----- #
+_cache: Optional[WorkbookCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> WorkbookCache:
+    """Returns the cache shared by the whole process"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = WorkbookCache()
+    return _cache
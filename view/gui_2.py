@@ -2,8 +2,14 @@ import customtkinter as ctk
 from CTkMessagebox import CTkMessagebox
 from tkinter import filedialog
 import os
+import queue
 from view.excel_spreadsheet import ExcelFile
-import model.model as m
+from view.violations_table import ViolationsTable
+import model.diagnostics as diagnostics
+import model.jobs as jobs
+import model.template_registry as tr
+
+WARNING_LINES_PER_KIND = 20  # Warnings of each kind listed under the violations table
 
 
 class View(ctk.CTk):
@@ -90,6 +96,102 @@ class Main(ctk.CTkFrame):
             widget.destroy()
 
 
+class ProgressPanel(ctk.CTkFrame):
+    """Progress bar, status and cancel button for a model function running in the background"""
+    poll_milliseconds = 100
+
+    def __init__(self, master):
+        # Page variables
+        self.job = None
+        self.progress = None
+        self.on_done = None
+        self.on_poll = None
+
+        # Create frame
+        super().__init__(master=master, fg_color='transparent')
+        self.grid_columnconfigure(index=0, weight=1)
+
+        # Create widgets
+        self.progress_bar = ctk.CTkProgressBar(master=self)
+        self.progress_bar.set(0)
+        self.status_label = ctk.CTkLabel(
+            master=self,
+            text='',
+            font=('Arial', 14, 'italic'),
+            text_color='grey',
+        )
+        self.cancel_button = ctk.CTkButton(
+            master=self,
+            text='Cancel',
+            font=('Arial', 14),
+            width=80,
+            state='disabled',
+            command=self.cancel,
+        )
+
+        # Place widgets
+        self.progress_bar.grid(row=0, column=0, sticky='ew', padx=5, pady=(5, 2.5))
+        self.status_label.grid(row=1, column=0, sticky='w', padx=5, pady=(2.5, 5))
+        self.cancel_button.grid(row=0, column=1, rowspan=2, sticky='ns', padx=5, pady=5)
+
+    @property
+    def is_running(self) -> bool:
+        return self.job is not None and not self.job.is_done
+
+    def start(self, function, *args, on_done, on_poll=None) -> None:
+        """Runs a model function on a worker thread and calls on_done(result, error) once it finishes
+
+        on_poll() is called from the main thread every poll (Used to show results as they come in)"""
+        self.progress = jobs.Progress()
+        self.on_done = on_done
+        self.on_poll = on_poll
+        self.job = jobs.BackgroundJob(function, *args, progress=self.progress)
+        self.progress_bar.set(0)
+        self.status_label.configure(text='Starting...')
+        self.cancel_button.configure(state='normal')
+        self.after(self.poll_milliseconds, self._poll)
+
+    def cancel(self) -> None:
+        """Stops the job the next time it reports progress"""
+        if self.is_running:
+            self.progress.cancel()
+            self.status_label.configure(text='Cancelling...')
+
+    def destroy(self):
+        # Don't leave a job running for a page that is gone
+        if self.is_running:
+            self.progress.cancel()
+        super().destroy()
+
+    def _poll(self) -> None:
+        """Updates the progress bar from the main thread until the job is done"""
+        if self.job is None or not self.winfo_exists():
+            return
+        stage, done, total = self.progress.get()
+        if total:
+            self.progress_bar.set(done / total)
+            self.status_label.configure(text=f"{stage}: {done} of {total}")
+        elif stage:
+            self.status_label.configure(text=f"{stage}: {done}" if done else f"{stage}...")
+        if self.on_poll is not None:
+            self.on_poll()
+        if not self.job.is_done:
+            self.after(self.poll_milliseconds, self._poll)
+            return
+
+        # Finished
+        job, self.job = self.job, None
+        self.cancel_button.configure(state='disabled')
+        if isinstance(job.error, jobs.JobCancelled):
+            self.status_label.configure(text='Cancelled')
+        elif job.error is not None:
+            self.status_label.configure(text='Failed')
+        else:
+            self.progress_bar.set(1)
+            self.status_label.configure(text='Done')
+        self.on_done(job.result, job.error)
+
+
 class FormatPage(ctk.CTkFrame):
     def __init__(self, master):
         # Page variables
@@ -121,7 +223,9 @@ class FormatPage(ctk.CTkFrame):
         self.output_label.grid(row=0, column=1, sticky='nsew', pady=(10, 5))
         self.input_frame.grid(row=1, column=0, sticky='nsew', padx=(10, 5), pady=5)
         self.output_frame.grid(row=1, column=1, sticky='nsew', padx=(5, 10), pady=5)
-        self.format_button.grid(row=2, column=0, columnspan=2, sticky='nsew', padx=10, pady=(5, 10))
+        self.format_button.grid(row=2, column=0, columnspan=2, sticky='nsew', padx=10, pady=5)
+        self.progress_panel = ProgressPanel(master=self)
+        self.progress_panel.grid(row=3, column=0, columnspan=2, sticky='nsew', padx=10, pady=(5, 10))
 
         # Create widgets
         button_font = ('Arial', 14)
@@ -155,7 +259,7 @@ class FormatPage(ctk.CTkFrame):
         # Output frame widgets
         self.output_template_option_menu = ctk.CTkOptionMenu(
             master=self.output_frame,
-            values=['PSE'],
+            values=tr.get_registry().get_names(),
             font=button_font,
         )
         self.output_template_label = ctk.CTkLabel(
@@ -236,8 +340,20 @@ class FormatPage(ctk.CTkFrame):
         # Set template
         output_excel.template = self.output_template_option_menu.get()
 
-        # Execute
-        m.format_to_template(input_excel, output_excel)
+        # Execute in the background so the window stays responsive (The model is imported on the first job)
+        import model.model as m
+        self.format_button.configure(state='disabled')
+        self.progress_panel.start(m.format_to_template, input_excel, output_excel, on_done=self.format_done)
+
+    def format_done(self, _result, error):
+        """Lets the user know how formatting went"""
+        self.format_button.configure(state='normal')
+        if isinstance(error, jobs.JobCancelled):
+            return
+        if error is not None:
+            CTkMessagebox(title='', message=f"Spreadsheet could not be formatted\n{error}", icon="cancel",
+                          option_1="Ok")
+            return
 
         # Pop up message
         CTkMessagebox(title='', message="Spreadsheet successfully formatted", icon="check", option_1="Ok")
@@ -247,6 +363,7 @@ class MakeReadyPage(ctk.CTkFrame):
     def __init__(self, master):
         # Page variables
         self.input_file_path = None
+        self.results = queue.Queue()  # <- Poles found by the worker thread that aren't in the table yet
 
         # Create page
         super().__init__(master=master)
@@ -260,7 +377,9 @@ class MakeReadyPage(ctk.CTkFrame):
 
         # Place labels and frames
         self.input_frame.grid(row=0, column=0, sticky='nsew', padx=10, pady=(10, 5))
-        self.display_frame.grid(row=1, column=0, sticky='nsew', padx=10, pady=(5, 10))
+        self.display_frame.grid(row=1, column=0, sticky='nsew', padx=10, pady=5)
+        self.progress_panel = ProgressPanel(master=self)
+        self.progress_panel.grid(row=2, column=0, sticky='nsew', padx=10, pady=(5, 10))
 
         # Create widgets
         button_font = ('Arial', 14)
@@ -269,7 +388,7 @@ class MakeReadyPage(ctk.CTkFrame):
         # Input frame widgets
         self.input_template_option_menu = ctk.CTkOptionMenu(
             master=self.input_frame,
-            values=['PSE'],
+            values=tr.get_registry().get_names(),
             font=button_font,
         )
         self.input_template_label = ctk.CTkLabel(
@@ -311,6 +430,35 @@ class MakeReadyPage(ctk.CTkFrame):
         self.include_make_ready_check_box.grid(row=2, column=0, columnspan=2, sticky='w', padx=5, pady=(2.5, 5))
         self.find_violations_button.grid(row=0, column=2, rowspan=3, sticky='nsew', padx=5, pady=5)
 
+        # Display frame widgets
+        self.search_entry = ctk.CTkEntry(
+            master=self.display_frame,
+            placeholder_text='Search sequence number',
+            font=button_font,
+        )
+        self.has_violations_check_box = ctk.CTkCheckBox(
+            master=self.display_frame,
+            text='Only show violations',
+            font=button_font,
+            command=self.filter_violations,
+        )
+        self.violations_table = ViolationsTable(master=self.display_frame)
+        self.warnings_textbox = ctk.CTkTextbox(
+            master=self.display_frame,
+            height=80,
+            font=('Arial', 12),
+            state='disabled',
+        )
+        self.search_entry.bind('<KeyRelease>', self.filter_violations)
+
+        # Place display frame widgets
+        self.display_frame.grid_columnconfigure(index=0, weight=1)
+        self.display_frame.grid_rowconfigure(index=1, weight=1)
+        self.search_entry.grid(row=0, column=0, sticky='ew', padx=5, pady=(5, 2.5))
+        self.has_violations_check_box.grid(row=0, column=1, sticky='e', padx=5, pady=(5, 2.5))
+        self.violations_table.grid(row=1, column=0, columnspan=2, sticky='nsew', padx=5, pady=2.5)
+        self.warnings_textbox.grid(row=2, column=0, columnspan=2, sticky='nsew', padx=5, pady=(2.5, 5))
+
     def open_file_dialog(self):
         """Allows button to select file from file explorer"""
         filepath = filedialog.askopenfilename()
@@ -321,38 +469,73 @@ class MakeReadyPage(ctk.CTkFrame):
             self.input_file_label.configure(text=filename)
 
     def find_violations(self):
-        """Gets violations and displays them"""
+        """Gets violations and displays them once they are found"""
         # Get user inputs
         input_excel_file = ExcelFile()
         input_excel_file.template = self.input_template_option_menu.get()
         input_excel_file.path = self.input_file_path
         make_ready_is_included = self.include_make_ready_check_box.get() == 1
 
-        # Get list
-        pole_list = m.get_pole_list_with_violations(input_excel_file, make_ready_is_included)
-
-        # Clear Display
-        for widget in self.display_frame.winfo_children():
-            widget.destroy()
+        # Find violations in the background so the window stays responsive
+        self.find_violations_button.configure(state='disabled')
+        self.violations_table.clear()
+        self.warnings_textbox.configure(state='normal')
+        self.warnings_textbox.delete('1.0', 'end')
+        self.warnings_textbox.configure(state='disabled')
+        self.results = queue.Queue()
+        self.progress_panel.start(
+            self.get_violations,
+            input_excel_file,
+            make_ready_is_included,
+            self.results,
+            on_done=self.display_violations,
+            on_poll=self.append_violations,
+        )
 
-        # Display violations
-        violations_frame = ctk.CTkScrollableFrame(master=self.display_frame, fg_color='transparent')
-        violations_frame.pack(expand=True, fill='both')
-        violations_frame.grid_columnconfigure(index=1, weight=1)
-
-        for index, pole in enumerate(pole_list):
-            # Create frames
-            sequence_number_frame = ctk.CTkFrame(master=violations_frame)
-            make_ready_frame = ctk.CTkFrame(master=violations_frame)
-            sequence_number_frame.grid(row=index, column=0, sticky='nsew', padx=2.5, pady=2.5)
-            make_ready_frame.grid(row=index, column=1, sticky='nsew', padx=2.5, pady=2.5)
-
-            # Add sequence numbers to frames
-            data_font = ('Arial', 14)
-            sequence_number = ctk.CTkLabel(master=sequence_number_frame, text=pole.sequence_number, font=data_font)
-            make_ready = ctk.CTkLabel(master=make_ready_frame, text=pole.make_ready, font=data_font)
-            sequence_number.pack(padx=10, pady=10, expand=True, fill='both')
-            make_ready.pack(padx=10, pady=10, expand=True, fill='both')
+    @staticmethod
+    def get_violations(input_excel_file, make_ready_is_included, results, progress=None):
+        """Runs on the worker thread and queues (sequence number, make ready) of each pole (Returns the warnings of the
+        job, which are logged once it is done)"""
+        # Poles are read and checked one row at a time so each one shows up in the table as soon as it is done
+        import model.model as m
+        with diagnostics.collect() as collector:
+            for pole in m.iter_poles_with_violations(input_excel_file, make_ready_is_included, progress):
+                results.put((pole.sequence_number, pole.make_ready))
+        return collector
+
+    def append_violations(self):
+        """Moves the poles found so far from the queue into the table"""
+        rows = []
+        while True:
+            try:
+                rows.append(self.results.get_nowait())
+            except queue.Empty:
+                break
+        if rows:
+            self.violations_table.append(rows)
+
+    def display_violations(self, collector, error):
+        """Shows the last of the violations once they are all found and any warnings"""
+        self.find_violations_button.configure(state='normal')
+        self.append_violations()
+        if isinstance(error, jobs.JobCancelled):
+            return
+        if error is not None:
+            CTkMessagebox(title='', message=f"Violations could not be found\n{error}", icon="cancel", option_1="Ok")
+            return
+
+        # Warnings about comments and attachments that couldn't be used
+        self.warnings_textbox.configure(state='normal')
+        self.warnings_textbox.delete('1.0', 'end')
+        self.warnings_textbox.insert('1.0', collector.get_summary(WARNING_LINES_PER_KIND) or 'No warnings')
+        self.warnings_textbox.configure(state='disabled')
+
+    def filter_violations(self, *_args):
+        """Hides poles that don't match the filter options"""
+        self.violations_table.set_filter(
+            has_violations_only=self.has_violations_check_box.get() == 1,
+            search_text=self.search_entry.get(),
+        )
 
 
 # Test code
@@ -0,0 +1,173 @@
+from tkinter import ttk
+from typing import Dict, Iterable, List, Set, Tuple
+import customtkinter as ctk
+
+
+class ViolationsTable(ctk.CTkFrame):
+    """
+    Table of poles and their make ready violations
+
+    Uses a ttk.Treeview so only the rows that are visible get drawn no matter how many poles there are. Sorting and
+    filtering move or detach existing rows instead of rebuilding the table.
+
+    self.rows: (sequence number, make ready) of every pole by row id in the order they were added
+    self.order: Row ids in the order they are displayed (Including rows hidden by a filter)
+    self.shown: Row ids that are attached to the tree (Not hidden by the filter)
+    self.has_violations_only: Only show poles with violations
+    self.search_text: Only show poles whose sequence number contains this text
+
+    Example of use:
+    table = ViolationsTable(master=frame)
+    table.pack(expand=True, fill='both')
+    table.append([(pole.sequence_number, pole.make_ready) for pole in pole_list])
+    table.sort_by_sequence_number()
+    table.set_filter(has_violations_only=True)
+    """
+
+    def __init__(self, master):
+        # Table variables
+        self.rows: Dict[str, Tuple[str, str]] = {}
+        self.order: List[str] = []
+        self.shown: Set[str] = set()
+        self.has_violations_only = False
+        self.search_text = ''
+        self.sort_is_descending = False
+
+        # Create frame
+        super().__init__(master=master, fg_color='transparent')
+        self.grid_columnconfigure(index=0, weight=1)
+        self.grid_rowconfigure(index=0, weight=1)
+        self._style_treeview()
+
+        # Create widgets
+        self.tree = ttk.Treeview(
+            master=self,
+            columns=('sequence_number', 'violation_count', 'make_ready'),
+            show='headings',
+            selectmode='browse',
+            style='Violations.Treeview',
+        )
+        self.tree.heading('sequence_number', text='Seq #', command=self.toggle_sort)
+        self.tree.heading('violation_count', text='Violations')
+        self.tree.heading('make_ready', text='Make Ready', anchor='w')
+        self.tree.column('sequence_number', width=80, stretch=False, anchor='center')
+        self.tree.column('violation_count', width=80, stretch=False, anchor='center')
+        self.tree.column('make_ready', width=400, stretch=True, anchor='w')
+        self.scrollbar = ctk.CTkScrollbar(master=self, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.detail_label = ctk.CTkLabel(
+            master=self,
+            text='Select a pole to see all of its violations',
+            font=('Arial', 14),
+            justify='left',
+            anchor='w',
+        )
+
+        # Place widgets
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        self.scrollbar.grid(row=0, column=1, sticky='ns')
+        self.detail_label.grid(row=1, column=0, columnspan=2, sticky='ew', padx=5, pady=(5, 0))
+
+        # Show every violation of the selected pole
+        self.tree.bind('<<TreeviewSelect>>', self.show_selected)
+
+    def append(self, rows: Iterable[Tuple[str, str]]) -> None:
+        """Adds (sequence number, make ready) rows to the end of the table as results come in"""
+        for sequence_number, make_ready in rows:
+            make_ready = make_ready or ''
+            violations = [line for line in make_ready.split('\n') if line]
+            row_id = self.tree.insert('', 'end', values=(sequence_number, len(violations), '  |  '.join(violations)))
+            self.rows[row_id] = (sequence_number, make_ready)
+            self.order.append(row_id)
+            if self._is_shown(row_id):
+                self.shown.add(row_id)
+            else:
+                self.tree.detach(row_id)
+
+    def clear(self) -> None:
+        """Removes every row"""
+        self.tree.delete(*self.order)
+        self.rows = {}
+        self.order = []
+        self.shown = set()
+        self.detail_label.configure(text='Select a pole to see all of its violations')
+
+    def toggle_sort(self) -> None:
+        """Sorts by sequence number, switching between ascending and descending"""
+        self.sort_by_sequence_number(descending=self.sort_is_descending)
+        self.sort_is_descending = not self.sort_is_descending
+
+    def sort_by_sequence_number(self, descending: bool = False) -> None:
+        """Reorders the existing rows"""
+        # The model is already loaded by the time there are rows to sort
+        from model.pole_manager import sequence_sort_key
+        self.order.sort(key=lambda row_id: sequence_sort_key(self.rows[row_id][0]), reverse=descending)
+        # Every shown row can change position so they are all moved
+        for index, row_id in enumerate(row_id for row_id in self.order if row_id in self.shown):
+            self.tree.move(row_id, '', index)
+
+    def set_filter(self, has_violations_only: bool = None, search_text: str = None) -> None:
+        """Hides rows that don't match (Hidden rows are detached, not deleted)"""
+        if has_violations_only is not None:
+            self.has_violations_only = has_violations_only
+        if search_text is not None:
+            self.search_text = search_text.strip().lower()
+        self._place_rows()
+
+    def show_selected(self, _event=None) -> None:
+        """Shows every violation of the selected pole under the table"""
+        selection = self.tree.selection()
+        if selection:
+            sequence_number, make_ready = self.rows[selection[0]]
+            self.detail_label.configure(text=f"{sequence_number}\n{make_ready or 'No violations'}")
+
+    def _place_rows(self) -> None:
+        """Detaches rows the filter now hides and reattaches rows it now shows (Other rows aren't touched)"""
+        # Rows are gone through in display order so index is where a reattached row goes among the shown rows
+        index = 0
+        for row_id in self.order:
+            is_shown = self._is_shown(row_id)
+            if is_shown and row_id not in self.shown:
+                self.tree.move(row_id, '', index)
+                self.shown.add(row_id)
+            elif not is_shown and row_id in self.shown:
+                self.tree.detach(row_id)
+                self.shown.discard(row_id)
+            if is_shown:
+                index += 1
+
+    def _is_shown(self, row_id: str) -> bool:
+        sequence_number, make_ready = self.rows[row_id]
+        if self.has_violations_only and not make_ready:
+            return False
+        return self.search_text in str(sequence_number).lower()
+
+    @staticmethod
+    def _style_treeview() -> None:
+        """Matches the treeview to the dark customtkinter theme (Only the table's own style, not the ttk theme)"""
+        style = ttk.Style()
+        style.configure(
+            'Violations.Treeview',
+            background='#2b2b2b',
+            fieldbackground='#2b2b2b',
+            foreground='white',
+            rowheight=28,
+            font=('Arial', 12),
+            borderwidth=0,
+        )
+        style.configure('Violations.Treeview.Heading', background='#1f538d', foreground='white',
+                        font=('Arial', 12, 'bold'), relief='flat')
+        style.map('Violations.Treeview', background=[('selected', '#1f538d')])
+        style.map('Violations.Treeview.Heading', background=[('active', '#14375e')])
+
+
+# Test code
+if __name__ == '__main__':
+    window = ctk.CTk()
+    window.geometry('800x500')
+    table = ViolationsTable(master=window)
+    table.pack(expand=True, fill='both', padx=10, pady=10)
+    table.append((f"{n}-1", 'VIOLATION-catv is 6" from fiber' if n % 3 else '') for n in range(1, 20001))
+    table.sort_by_sequence_number(descending=True)
+    table.set_filter(has_violations_only=True)
+    window.mainloop()